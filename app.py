@@ -3,63 +3,856 @@ Lost and Found Management System
 A beginner-friendly Flask application for managing lost and found items.
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import sqlite3
 from datetime import datetime
 from functools import wraps
 import os
 import uuid
 import difflib
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, send_from_directory
+import random
+import threading
+import math
+import heapq
+import re
+import json
+import queue
+from collections import deque
+import click
+from flask import (Blueprint, Flask, Response, current_app, render_template, request, redirect, url_for,
+                   flash, get_flashed_messages, jsonify, session, send_from_directory, stream_template)
+from jinja2 import FileSystemBytecodeCache
 
-app = Flask(__name__)
-app.secret_key = 'your-secret-key-here'  # Change this in production
+# All routes live on this blueprint; create_app() registers it on a new app
+bp = Blueprint('main', __name__, cli_group=None)
 
 # File upload configuration
 UPLOAD_FOLDER = 'static/uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-
-# Ensure upload directory exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # Database configuration
 DATABASE = 'lost_and_found.db'
 
+# Photo matching configuration
+# Two image hashes at most this many bits apart (out of 64) count as similar photos
+IMAGE_MATCH_MAX_DISTANCE = 10
+
+DEFAULT_CONFIG = {
+    'SECRET_KEY': 'your-secret-key-here',  # Change this in production
+    'DATABASE': DATABASE,
+    'UPLOAD_FOLDER': UPLOAD_FOLDER,
+
+    # Write contention
+    # Seconds SQLite itself waits for a lock before raising "database is locked"
+    'DATABASE_BUSY_TIMEOUT': 5,
+    # After that, a write transaction is retried this many times, sleeping a
+    # random 0..WRITE_RETRY_BASE_DELAY * 2**attempt seconds between attempts
+    'WRITE_RETRIES': 4,
+    'WRITE_RETRY_BASE_DELAY': 0.05,
+
+    # Admission control
+    # Each user (or IP address for anonymous clients) may submit REPORT_RATE_LIMIT
+    # reports per REPORT_RATE_PERIOD seconds, with short bursts up to the limit.
+    'REPORT_RATE_LIMIT': 5,
+    'REPORT_RATE_PERIOD': 60,
+    # 'memory' keeps buckets per process, 'sqlite' shares them between workers
+    'RATE_LIMIT_STORAGE': 'memory',
+    # Maximum number of report submissions running the match scan at once
+    'MATCH_CONCURRENCY_LIMIT': 4,
+    # How long a request waits for a free match slot before it is turned away
+    'MATCH_SLOT_TIMEOUT': 2,
+    'MATCH_RETRY_AFTER': 5,
+
+    # Live updates
+    # Every open /events stream holds a worker thread, so cap how many there are
+    'EVENT_STREAM_MAX_CONNECTIONS': 50,
+    'EVENT_STREAM_MAX_PER_USER': 3,
+    # Seconds between heartbeat comments that keep proxies from closing idle streams
+    'EVENT_STREAM_HEARTBEAT': 15,
+    # Events buffered per stream; a client that falls further behind is disconnected
+    'EVENT_STREAM_QUEUE_SIZE': 100,
+
+    # Startup
+    # Compiled templates are cached here so new workers don't compile them again.
+    # None uses the instance folder; False turns the cache off.
+    'JINJA_BYTECODE_CACHE_DIR': None,
+    # Load every template while the app is created instead of on first use
+    'PRECOMPILE_TEMPLATES': False,
+}
+
+
+def create_app(config=None):
+    """Create and configure the Flask application.
+
+    Creating the app does no database or upload folder work; those happen on
+    first use (and migrate_db() is run by the startup script). Timings for each
+    step are kept in app.extensions['startup_timings'] for startup_report().
+    """
+    timings = []
+    started = time.perf_counter()
+
+    def mark(step):
+        nonlocal started
+        now = time.perf_counter()
+        timings.append((step, now - started))
+        started = now
+
+    app = Flask(__name__)
+    app.config.from_mapping(DEFAULT_CONFIG)
+    if config:
+        app.config.update(config)
+    app.register_blueprint(bp)
+
+    app.extensions['match_slots'] = threading.BoundedSemaphore(app.config['MATCH_CONCURRENCY_LIMIT'])
+    app.extensions['event_broker'] = EventBroker()
+    app.extensions['image_indexes'] = {
+        'lost_items': ImageHashIndex('lost_items'),
+        'found_items': ImageHashIndex('found_items'),
+    }
+    mark('create app')
+
+    cache_dir = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if cache_dir is not False:
+        cache_dir = cache_dir or os.path.join(app.instance_path, 'jinja_cache')
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        except OSError:
+            app.logger.warning('Template cache directory %s is not writable; templates will be compiled in memory',
+                               cache_dir)
+    mark('template cache')
+
+    if app.config['PRECOMPILE_TEMPLATES']:
+        # Loading a template compiles it (or reads it from the bytecode cache)
+        # and keeps it in the environment's in-memory cache
+        for name in app.jinja_env.list_templates(extensions=['html']):
+            app.jinja_env.get_template(name)
+        mark('precompile templates')
+
+    app.extensions['startup_timings'] = [('import app.py', _IMPORT_DURATION)] + timings
+    return app
+
+@bp.cli.command('precompile-templates')
+def precompile_templates():
+    """Compile all templates into the bytecode cache (run this at build time)."""
+    jinja_env = current_app.jinja_env
+    if jinja_env.bytecode_cache is None:
+        raise click.ClickException('The template bytecode cache is disabled (JINJA_BYTECODE_CACHE_DIR is False).')
+    names = jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        jinja_env.get_template(name)
+    click.echo(f'Compiled {len(names)} templates into {jinja_env.bytecode_cache.directory}')
+
+def startup_report(app):
+    """Describe how long each startup step took, one step per line"""
+    timings = app.extensions['startup_timings']
+    lines = [f'  {step:<22}{seconds * 1000:8.1f} ms' for step, seconds in timings]
+    lines.append(f"  {'total':<22}{sum(seconds for step, seconds in timings) * 1000:8.1f} ms")
+    return '\n'.join(lines)
+
 # Helper function to check allowed file extensions
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 # Route to serve uploaded files
-@app.route('/uploads/<filename>')
+@bp.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
 
 def get_db():
     """Get database connection"""
-    conn = sqlite3.connect(DATABASE)
+    conn = sqlite3.connect(current_app.config['DATABASE'], timeout=current_app.config['DATABASE_BUSY_TIMEOUT'])
     conn.row_factory = sqlite3.Row
     return conn
 
+def is_busy_error(error):
+    """True if an sqlite3 error means another connection holds the lock"""
+    return isinstance(error, sqlite3.OperationalError) and (
+        'database is locked' in str(error) or 'database is busy' in str(error))
+
+def run_write_transaction(db, work):
+    """Run work(db) in a single write transaction and return its result.
+
+    BEGIN IMMEDIATE takes the write lock up front, so the reads and writes in
+    work() see a consistent database and nothing can change between them. If
+    the database stays locked past the busy timeout the whole transaction is
+    retried with jittered exponential backoff, so competing writers spread out
+    instead of retrying in lockstep.
+    """
+    retries = current_app.config['WRITE_RETRIES']
+    base_delay = current_app.config['WRITE_RETRY_BASE_DELAY']
+    for attempt in range(retries + 1):
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            result = work(db)
+            db.commit()
+            return result
+        except Exception as e:
+            if db.in_transaction:
+                db.rollback()
+            if not is_busy_error(e) or attempt == retries:
+                raise
+            time.sleep(random.uniform(0, base_delay * 2 ** attempt))
+
 def init_db():
-    """Initialize database with schema"""
-    with app.app_context():
-        db = get_db()
-        # Read and execute schema file
-        with open('schema.sql', 'r') as f:
-            schema = f.read()
-        db.executescript(schema)
+    """Initialize database with schema, and sample data if the database is new (needs an app context)"""
+    migrate_db()
+    db = get_db()
+    if db.execute('SELECT COUNT(*) FROM users').fetchone()[0] == 0:
+        with open('sample_data.sql', 'r') as f:
+            db.executescript(f.read())
+        resolve_item_locations(db, get_gazetteer(db))
+        db.commit()
+    db.close()
+
+
+# Schema migrations
+# Each migration runs once, in order, inside its own transaction. The number
+# of applied migrations is stored in the database's user_version pragma.
+# Only append to this list; never edit a migration that has been released.
+def run_sql_script(db, path):
+    """Execute every statement of a .sql file on db without committing"""
+    with open(path, 'r') as f:
+        script = f.read()
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            db.execute(statement)
+            statement = ''
+
+def add_column_if_missing(db, table, column, definition):
+    """Add a column to a table unless it already exists.
+
+    ALTER TABLE ... ADD COLUMN only touches the schema, not the rows, so it
+    is cheap even on large tables.
+    """
+    columns = {row[1] for row in db.execute(f'PRAGMA table_info({table})')}
+    if column not in columns:
+        db.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+def migration_baseline(db):
+    run_sql_script(db, 'schema.sql')
+
+def migration_item_owner_and_image_hash(db):
+    for table in ('lost_items', 'found_items'):
+        add_column_if_missing(db, table, 'user_id', 'INTEGER')
+        add_column_if_missing(db, table, 'image_hash', 'VARCHAR(16)')
+
+def migration_list_and_claim_indexes(db):
+    for table in ('lost_items', 'found_items'):
+        # Home page, counts and matching filter on status, newest first
+        db.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_status_created ON {table} (status, created_at)')
+        # List pages and admin dashboard show everything, newest first
+        db.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_created ON {table} (created_at)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_claims_item ON claims (item_type, item_id, created_at)')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_claims_created ON claims (created_at)')
+
+def migration_rate_limits(db):
+    db.execute('''CREATE TABLE IF NOT EXISTS rate_limits (
+                      bucket_key VARCHAR(100) PRIMARY KEY,
+                      tokens REAL NOT NULL,
+                      updated_at REAL NOT NULL
+                  )''')
+
+def migration_change_log(db):
+    db.execute('''CREATE TABLE IF NOT EXISTS item_changes (
+                      seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                      table_name VARCHAR(20) NOT NULL,
+                      row_id INTEGER NOT NULL,
+                      op VARCHAR(10) NOT NULL,  -- insert, update, delete
+                      version INTEGER NOT NULL,  -- 1 for the first change to a row, then 2, 3, ...
+                      changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                  )''')
+    db.execute('CREATE INDEX IF NOT EXISTS idx_item_changes_row ON item_changes (table_name, row_id, version)')
+    db.execute('''CREATE TABLE IF NOT EXISTS change_consumers (
+                      name VARCHAR(50) PRIMARY KEY,
+                      position INTEGER NOT NULL,
+                      updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                  )''')
+    for table in CHANGE_LOG_TABLES:
+        # Rows that already exist are logged once so a new consumer can start from the beginning
+        db.execute(f'''INSERT INTO item_changes (table_name, row_id, op, version)
+                       SELECT '{table}', id, 'insert', 1 FROM {table}''')
+        for op, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+            db.execute(f'''CREATE TRIGGER IF NOT EXISTS log_{table}_{op} AFTER {op.upper()} ON {table}
+                           BEGIN
+                               INSERT INTO item_changes (table_name, row_id, op, version)
+                               VALUES ('{table}', {row}.id, '{op}',
+                                       (SELECT COALESCE(MAX(version), 0) + 1 FROM item_changes
+                                        WHERE table_name = '{table}' AND row_id = {row}.id));
+                           END''')
+
+def migration_location_gazetteer(db):
+    db.execute('''CREATE TABLE IF NOT EXISTS locations (
+                      id INTEGER PRIMARY KEY,
+                      name VARCHAR(100) NOT NULL,
+                      parent_id INTEGER REFERENCES locations (id)
+                  )''')
+    db.execute('''CREATE TABLE IF NOT EXISTS location_aliases (
+                      alias VARCHAR(100) PRIMARY KEY,
+                      location_id INTEGER NOT NULL REFERENCES locations (id)
+                  )''')
+    run_sql_script(db, 'locations.sql')
+    for table in ('lost_items', 'found_items'):
+        add_column_if_missing(db, table, 'location_id', 'INTEGER')
+    resolve_item_locations(db, Gazetteer.load(db))
+
+def migration_claim_status_index(db):
+    # Pending claims count on the admin dashboard
+    db.execute('CREATE INDEX IF NOT EXISTS idx_claims_status ON claims (status)')
+
+MIGRATIONS = [
+    migration_baseline,
+    migration_item_owner_and_image_hash,
+    migration_list_and_claim_indexes,
+    migration_rate_limits,
+    migration_change_log,
+    migration_location_gazetteer,
+    migration_claim_status_index,
+]
+
+def migrate_db(database=None):
+    """Apply pending migrations and return the schema version.
+
+    Uses the app's DATABASE unless a database path is given. Safe to call from several workers at once: each migration takes the write
+    lock and re-checks the version before running.
+    """
+    conn = sqlite3.connect(database or current_app.config['DATABASE'], timeout=30)
+    # Manage transactions explicitly so DDL and the version bump commit together
+    conn.isolation_level = None
+    try:
+        # Write-ahead logging lets readers keep going while a write commits.
+        # The setting is stored in the database file, so this is a no-op later.
+        conn.execute('PRAGMA journal_mode = WAL')
+        # Nothing to do on a normal restart: skip taking the write lock
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= len(MIGRATIONS):
+            return len(MIGRATIONS)
+        for version, migration in enumerate(MIGRATIONS, start=1):
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if conn.execute('PRAGMA user_version').fetchone()[0] < version:
+                    migration(conn)
+                    conn.execute(f'PRAGMA user_version = {version}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        # Refresh the statistics the query planner uses to choose indexes
+        conn.execute('PRAGMA optimize')
+        return len(MIGRATIONS)
+    finally:
+        conn.close()
+
+
+# Change log
+# Triggers append a row to item_changes for every insert, update and delete on
+# these tables. Writes are serialized by SQLite, so seq order is commit order:
+# a consumer that remembers the last seq it handled never misses a change.
+# Entries only say which row changed; consumers re-read the row itself.
+CHANGE_LOG_TABLES = ('lost_items', 'found_items', 'claims')
+CHANGE_BATCH_SIZE = 500
+
+def latest_change_seq(db):
+    """The seq of the newest change log entry (0 if the log is empty)"""
+    return db.execute('SELECT COALESCE(MAX(seq), 0) FROM item_changes').fetchone()[0]
+
+def read_changes(db, after_seq, limit=CHANGE_BATCH_SIZE):
+    """Return up to limit change log entries with seq greater than after_seq, oldest first"""
+    return db.execute(
+        'SELECT seq, table_name, row_id, op, version FROM item_changes WHERE seq > ? ORDER BY seq LIMIT ?',
+        (after_seq, limit)
+    ).fetchall()
+
+def get_consumer_position(db, consumer):
+    """The last seq a named consumer has handled (0 for a new consumer)"""
+    row = db.execute('SELECT position FROM change_consumers WHERE name = ?', (consumer,)).fetchone()
+    return row['position'] if row else 0
+
+def save_consumer_position(db, consumer, seq):
+    """Record that a consumer has handled every change up to seq. Never moves backwards."""
+    db.execute(
+        '''INSERT INTO change_consumers (name, position) VALUES (?, ?)
+           ON CONFLICT (name) DO UPDATE SET position = MAX(position, excluded.position),
+                                            updated_at = CURRENT_TIMESTAMP''',
+        (consumer, seq)
+    )
+    db.commit()
+
+def consume_changes(db, consumer, handle_batch, batch_size=CHANGE_BATCH_SIZE):
+    """Pass every change since the consumer's stored position to handle_batch(changes).
+
+    The position is saved after each batch, so a consumer that crashes
+    re-reads at most one batch when it restarts (handle_batch should not mind
+    seeing a change twice). Returns the number of changes handled.
+    """
+    position = get_consumer_position(db, consumer)
+    handled = 0
+    while True:
+        changes = read_changes(db, position, batch_size)
+        if not changes:
+            return handled
+        handle_batch(changes)
+        position = changes[-1]['seq']
+        save_consumer_position(db, consumer, position)
+        handled += len(changes)
+
+def compact_changes(db, batch_size=10000):
+    """Delete change log entries nobody needs any more and return how many were deleted.
+
+    An entry can go once every registered consumer has read it and a newer
+    entry exists for the same row (a consumer starting from scratch still sees
+    the latest change to every row). Deletes that everyone has read are dropped
+    too. Works through the log in batches to keep each write lock short.
+    """
+    row = db.execute('SELECT MIN(position) FROM change_consumers').fetchone()
+    upto = row[0] if row[0] is not None else latest_change_seq(db)
+    deleted = 0
+    start = 0
+    while start < upto:
+        end = min(start + batch_size, upto)
+        deleted += run_write_transaction(db, lambda db: db.execute(
+            '''DELETE FROM item_changes
+               WHERE seq > ? AND seq <= ?
+                 AND (op = 'delete' OR EXISTS (
+                     SELECT 1 FROM item_changes AS newer
+                     WHERE newer.table_name = item_changes.table_name
+                       AND newer.row_id = item_changes.row_id
+                       AND newer.version > item_changes.version))''',
+            (start, end)
+        ).rowcount)
+        start = end
+    return deleted
+
+@bp.cli.command('compact-changes')
+def compact_changes_command():
+    """Remove change log entries that every consumer has already read."""
+    db = get_db()
+    deleted = compact_changes(db)
+    db.close()
+    click.echo(f'Removed {deleted} change log entries')
+
+
+# Photo matching
+def compute_image_hash(path):
+    """Compute a 64-bit difference hash (dHash) of an image file.
+
+    The image is shrunk to 9x8 grayscale pixels and each bit records whether a
+    pixel is brighter than its right-hand neighbour, so resized or recompressed
+    copies of the same photo get (nearly) the same hash.
+
+    Returns the hash as 16 hex characters, or None if the image can't be read.
+    """
+    try:
+        # Imported here so the app starts without paying for Pillow
+        from PIL import Image
+    except ImportError:
+        # Pillow is only needed for photo matching; without it uploads are simply not hashed
+        return None
+    try:
+        with Image.open(path) as image:
+            pixels = image.convert('L').resize((9, 8), Image.LANCZOS).tobytes()
+    except (OSError, ValueError):
+        return None
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return f'{value:016x}'
+
+def hamming_distance(a, b):
+    """Number of differing bits between two integer hashes"""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """BK-tree over integer hashes using Hamming distance.
+
+    Each child edge is labelled with its distance to the parent, so a search
+    only needs to descend into children whose label is within max_distance of
+    the query's distance to the parent (triangle inequality).
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, item_ids, {distance: child}]
+
+    def add(self, value, item_id):
+        if self.root is None:
+            self.root = [value, [item_id], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item_id], {}]
+                return
+            node = child
+
+    def search(self, value, max_distance):
+        """Return {item_id: distance} for every hash within max_distance"""
+        matches = {}
+        if self.root is None:
+            return matches
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                for item_id in node[1]:
+                    matches[item_id] = distance
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        return matches
+
+
+class ImageHashIndex:
+    """In-memory BK-tree of the photo hashes in one item table.
+
+    Built once from the whole table, then kept up to date by reading the change
+    log, so a search only reads the rows that changed since the previous one.
+    The index is not a registered consumer: it keeps its log position in
+    memory, so compact_changes() doesn't wait for it. That is safe because
+    compaction always keeps the newest entry for a row that is still there,
+    and a deleted item whose log entry was compacted away before the index
+    saw it can only linger as a stale id, which callers drop by checking
+    results against live rows (find_similar_items only scores items it just
+    read from the table). Claimed items stay in the index for the same reason.
+
+    The tree can't delete entries: hashes that were replaced or deleted stay in
+    it but are filtered out of results, and the tree is rebuilt once they
+    outnumber the live ones.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._lock = threading.Lock()
+        self._tree = None
+        self._hashes = {}  # item id -> current hash
+        self._stale = 0    # tree entries no longer in _hashes
+        self._seq = 0      # last change log entry applied
+
+    def search(self, db, image_hash, max_distance):
+        with self._lock:
+            if self._tree is None or self._stale > len(self._hashes):
+                self._rebuild(db)
+            self._apply_changes(db)
+            value = int(image_hash, 16)
+            matches = {}
+            for item_id in self._tree.search(value, max_distance):
+                current = self._hashes.get(item_id)
+                if current is not None and hamming_distance(value, current) <= max_distance:
+                    matches[item_id] = hamming_distance(value, current)
+            return matches
+
+    def _rebuild(self, db):
+        # Read the log position first: changes made during the scan are then
+        # applied again afterwards, which is harmless
+        self._seq = latest_change_seq(db)
+        self._tree = BKTree()
+        self._hashes = {}
+        self._stale = 0
+        for row in db.execute(f'SELECT id, image_hash FROM {self.table} WHERE image_hash IS NOT NULL'):
+            self._set_hash(row['id'], int(row['image_hash'], 16))
+
+    def _apply_changes(self, db):
+        while True:
+            changes = read_changes(db, self._seq)
+            if not changes:
+                return
+            self._seq = changes[-1]['seq']
+            item_ids = list({change['row_id'] for change in changes if change['table_name'] == self.table})
+            if not item_ids:
+                continue
+            placeholders = ', '.join('?' * len(item_ids))
+            current = {row['id']: row['image_hash'] for row in db.execute(
+                f'SELECT id, image_hash FROM {self.table} WHERE id IN ({placeholders})', item_ids)}
+            for item_id in item_ids:
+                image_hash = current.get(item_id)
+                self._set_hash(item_id, int(image_hash, 16) if image_hash else None)
+
+    def _set_hash(self, item_id, value):
+        old = self._hashes.get(item_id)
+        if old == value:
+            return
+        if old is not None:
+            del self._hashes[item_id]
+            self._stale += 1
+        if value is not None:
+            self._hashes[item_id] = value
+            self._tree.add(value, item_id)
+
+
+def save_upload(file):
+    """Save an uploaded image and return (filename, image_hash), or (None, None)"""
+    if not file or not allowed_file(file.filename):
+        return None, None
+    # Generate unique filename
+    filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
+    # Create the upload folder on first use rather than at startup
+    os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
+    path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+    file.save(path)
+    return filename, compute_image_hash(path)
+
+@bp.cli.command('backfill-image-hashes')
+@click.option('--workers', default=None, type=int, help='Number of worker processes')
+def backfill_image_hashes(workers):
+    """Compute photo hashes for items uploaded before photo matching existed."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    db = get_db()
+    for table in ('lost_items', 'found_items'):
+        rows = db.execute(
+            f'SELECT id, image_filename FROM {table} '
+            'WHERE image_filename IS NOT NULL AND image_hash IS NULL'
+        ).fetchall()
+        paths = [os.path.join(current_app.config['UPLOAD_FOLDER'], row['image_filename']) for row in rows]
+
+        # Decoding images is CPU bound, so spread it over several processes
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            hashes = list(executor.map(compute_image_hash, paths, chunksize=16))
+
+        updates = [(image_hash, row['id']) for row, image_hash in zip(rows, hashes) if image_hash]
+        db.executemany(f'UPDATE {table} SET image_hash = ? WHERE id = ?', updates)
         db.commit()
+        click.echo(f'{table}: hashed {len(updates)} of {len(rows)} images')
+    db.close()
+
+
+# Location gazetteer
+def normalize_location(text):
+    """Lowercase text and reduce it to words separated by single spaces"""
+    return ' '.join(re.findall(r'[a-z0-9]+', (text or '').lower()))
+
+
+class LocationTrie:
+    """Prefix tree mapping normalized location aliases to location ids."""
+
+    END = None  # Key marking the end of an alias; never a character
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, alias, location_id):
+        node = self.root
+        for char in alias:
+            node = node.setdefault(char, {})
+        node[self.END] = location_id
+
+    def longest_match(self, text, start=0):
+        """Return (length, location_id) of the longest alias at text[start:]
+        that ends on a word boundary, or (0, None)"""
+        best = (0, None)
+        node = self.root
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if self.END in node and (i + 1 == len(text) or text[i + 1] == ' '):
+                best = (i + 1 - start, node[self.END])
+        return best
+
+    def complete(self, prefix, limit):
+        """Return up to limit (alias, location_id) pairs starting with prefix, shortest first"""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        results = []
+        pending = deque([(prefix, node)])
+        while pending and len(results) < limit:
+            text, node = pending.popleft()
+            if self.END in node:
+                results.append((text, node[self.END]))
+            for char in sorted(key for key in node if key is not self.END):
+                pending.append((text + char, node[char]))
+        return results
+
+
+class Gazetteer:
+    """Canonical campus locations with their aliases and building/zone hierarchy.
+
+    Free-text locations are resolved to a location id once, when an item is
+    saved. How close two locations are depends on their deepest shared
+    ancestor (Library 2nd Floor and Library 1st Floor are both in Library) and
+    is precomputed for every pair, so scoring a candidate is a dict lookup.
+    """
+
+    def __init__(self, locations, aliases):
+        """locations: (id, name, parent_id) rows; aliases: (alias, location_id) rows"""
+        self.names = {}
+        parents = {}
+        self.trie = LocationTrie()
+        for location_id, name, parent_id in locations:
+            self.names[location_id] = name
+            parents[location_id] = parent_id
+            self.trie.add(normalize_location(name), location_id)
+        for alias, location_id in aliases:
+            self.trie.add(normalize_location(alias), location_id)
+
+        # Each location's ancestors, starting with itself and ending at the root
+        self._lineage = lineage = {}
+        for location_id in self.names:
+            chain = [location_id]
+            while parents.get(chain[-1]) in self.names and len(chain) <= len(self.names):
+                chain.append(parents[chain[-1]])
+            lineage[location_id] = chain
+
+        # Wu-Palmer similarity: 2 * depth(shared ancestor) / (depth(a) + depth(b)),
+        # with the root at depth 1. 1.0 for the same place, 0.8 for a building
+        # and one of its zones, 0.67 for two zones of one building. Everything
+        # is on campus, so sharing only the root doesn't make two places close.
+        self._closeness = {}
+        for a, a_chain in lineage.items():
+            a_ancestors = set(a_chain)
+            row = self._closeness[a] = {}
+            for b, b_chain in lineage.items():
+                common = next((ancestor for ancestor in b_chain if ancestor in a_ancestors), None)
+                if common is not None and (a == b or len(lineage[common]) > 1):
+                    similarity = 2 * len(lineage[common]) / (len(a_chain) + len(b_chain))
+                    row[b] = (similarity, common)
+
+    @classmethod
+    def load(cls, db):
+        return cls(db.execute('SELECT id, name, parent_id FROM locations').fetchall(),
+                   db.execute('SELECT alias, location_id FROM location_aliases').fetchall())
+
+    def resolve(self, text):
+        """Return the id of the most specific known location mentioned in text, or None.
 
+        Every word start is tried for the longest matching alias. The location
+        that agrees with the most mentions wins, so "Student center cafeteria"
+        is the Cafeteria and "Lib 2nd floor" is Library 2nd Floor. Between
+        unrelated mentions the less specific one wins: in "Library entrance"
+        the entrance is the library's, not the Main Entrance.
+        """
+        text = normalize_location(text)
+        mentions = {}  # location_id -> longest alias length
+        for start in range(len(text)):
+            if start == 0 or text[start - 1] == ' ':
+                length, location_id = self.trie.longest_match(text, start)
+                if length > mentions.get(location_id, 0):
+                    mentions[location_id] = length
+        if not mentions:
+            return None
+
+        def rank(location_id):
+            lineage = self._lineage[location_id]
+            agreeing = sum(1 for mentioned in mentions if mentioned in lineage)
+            return agreeing, -len(lineage), mentions[location_id]
+
+        return max(mentions, key=rank)
+
+    def suggest(self, prefix, limit=8):
+        """Canonical names of locations with a name or alias starting with prefix"""
+        prefix = normalize_location(prefix)
+        if not prefix:
+            return []
+        names = []
+        for alias, location_id in self.trie.complete(prefix, limit * 4):
+            if self.names[location_id] not in names:
+                names.append(self.names[location_id])
+        return names[:limit]
+
+    def closeness(self, a, b):
+        """(similarity from 0 to 1, id of the closest shared location) for two location ids"""
+        return self._closeness.get(a, {}).get(b, (0.0, None))
+
+
+def get_gazetteer(db):
+    """Return the app's gazetteer, loading it from the database the first time"""
+    gazetteer = current_app.extensions.get('gazetteer')
+    if gazetteer is None:
+        gazetteer = Gazetteer.load(db)
+        current_app.extensions['gazetteer'] = gazetteer
+    return gazetteer
+
+def resolve_item_locations(db, gazetteer):
+    """Set location_id on every item from its free-text location (does not commit)"""
+    for table in ('lost_items', 'found_items'):
+        rows = db.execute(f'SELECT id, location FROM {table}').fetchall()
+        db.executemany(f'UPDATE {table} SET location_id = ? WHERE id = ?',
+                       [(gazetteer.resolve(row[1]), row[0]) for row in rows])
+
+@bp.cli.command('resolve-locations')
+def resolve_locations_command():
+    """Match every item to a campus location again after editing the gazetteer."""
+    db = get_db()
+    resolve_item_locations(db, Gazetteer.load(db))
+    db.commit()
+    db.close()
+    click.echo('Item locations updated')
+
+def location_match(gazetteer, location, location_id, compare_item):
+    """Compare a location with a candidate item's location.
+
+    Returns (similarity, reason). Locations outside the gazetteer only match
+    if their text is the same.
+    """
+    compare_location_id = compare_item['location_id']
+    if location_id is not None and compare_location_id is not None:
+        similarity, common = gazetteer.closeness(location_id, compare_location_id)
+        if location_id == compare_location_id:
+            return similarity, f"Same location: {gazetteer.names[location_id]}"
+        if common is not None:
+            return similarity, f"Nearby location: both at {gazetteer.names[common]}"
+        return 0.0, None
+    if location_id is None and compare_location_id is None and \
+            normalize_location(location) == normalize_location(compare_item['location']):
+        return 1.0, f"Same location: {compare_item['location']}"
+    return 0.0, None
+
+@bp.route('/locations/suggest')
+def suggest_locations():
+    """Autocomplete for the location fields on the report and edit forms"""
+    db = get_db()
+    names = get_gazetteer(db).suggest(request.args.get('q', ''))
+    db.close()
+    return jsonify({'locations': names})
+
+
+# Match scoring
+MATCH_LIMIT = 5      # Number of suggestions shown
+MATCH_MIN_SCORE = 30  # Minimum score for an item to be suggested
+
+# How many candidates the match scorer skipped without running the full
+# difflib comparison (see find_similar_items)
+match_stats = {'scans': 0, 'candidates': 0, 'pruned': 0}
+match_stats_lock = threading.Lock()
+
+def name_points(similarity):
+    """Score for an item name similarity ratio"""
+    return int(similarity * 30) if similarity > 0.6 else 0
+
+def location_points(similarity):
+    """Score for a location similarity (see location_match)"""
+    return int(similarity * 20) if similarity > 0.5 else 0
 
 def find_similar_items(item_type, item_data):
-    """Find similar items based on category, name, location, and date proximity.
+    """Find similar items based on category, name, location, date proximity and photo.
     
     Args:
         item_type: 'lost' or 'found' - the type of item being reported
-        item_data: dict with item details (item_name, category, location, lost_date/found_date)
+        item_data: dict with item details (item_name, category, location, lost_date/found_date,
+                   and optionally image_hash)
     
     Returns:
-        List of similar items sorted by similarity score
+        List of the top MATCH_LIMIT similar items sorted by similarity score
+    
+    Candidates are scored cheapest term first, and the expensive name
+    comparison is skipped once an upper bound on the score shows the
+    candidate can't reach MATCH_MIN_SCORE or beat the current top matches.
     """
     db = get_db()
     
@@ -87,7 +880,13 @@ def find_similar_items(item_type, item_data):
     # Extract item data
     item_name = item_data.get('item_name', '').lower()
     item_category = item_data.get('category', '').lower()
-    item_location = item_data.get('location', '').lower()
+    item_location = item_data.get('location', '')
+    gazetteer = get_gazetteer(db)
+    # Report routes resolve the location when saving the item
+    if 'location_id' in item_data:
+        item_location_id = item_data['location_id']
+    else:
+        item_location_id = gazetteer.resolve(item_location)
     
     # Parse date
     item_date_str = item_data.get('lost_date' if item_type == 'lost' else 'found_date', '')
@@ -96,58 +895,512 @@ def find_similar_items(item_type, item_data):
     except ValueError:
         item_date = None
     
-    similar_items = []
-    
-    for compare_item in compare_items:
-        # Calculate similarity scores
-        score = 0
-        reasons = []
+    # Look up items with similar photos in the BK-tree instead of comparing every hash
+    image_matches = {}
+    if item_data.get('image_hash'):
+        image_matches = current_app.extensions['image_indexes'][compare_table].search(
+            db, item_data['image_hash'], IMAGE_MATCH_MAX_DISTANCE)
+    
+    # Keep only the best MATCH_LIMIT candidates in a min-heap of
+    # (score, -position, match). The weakest kept match sits at top[0]; a later
+    # candidate with an equal score loses the tie, just like a stable sort.
+    top = []
+    pruned = 0
+    
+    def cannot_qualify(upper_bound):
+        """True if a candidate scoring at most upper_bound can't change the result"""
+        if upper_bound < MATCH_MIN_SCORE:
+            return True
+        return len(top) == MATCH_LIMIT and upper_bound <= top[0][0]
+    
+    for position, compare_item in enumerate(compare_items):
+        # Cheap terms first: category, location, date and photo need no string matching
+        base_score = 0
         
         # Compare categories (exact match gives high score)
         compare_category = compare_item['category'].lower()
-        if item_category == compare_category:
-            score += 40
-            reasons.append(f"Same category: {item_category}")
-        
-        # Compare item names (using difflib for similarity)
-        compare_name = compare_item['item_name'].lower()
-        name_similarity = difflib.SequenceMatcher(None, item_name, compare_name).ratio()
-        if name_similarity > 0.6:
-            score += int(name_similarity * 30)
-            reasons.append(f"Similar name ({int(name_similarity * 100)}% match)")
+        same_category = item_category == compare_category
+        if same_category:
+            base_score += 40
         
-        # Compare locations (using difflib for similarity)
-        compare_location = compare_item['location'].lower()
-        location_similarity = difflib.SequenceMatcher(None, item_location, compare_location).ratio()
-        if location_similarity > 0.5:
-            score += int(location_similarity * 20)
-            reasons.append(f"Similar location ({int(location_similarity * 100)}% match)")
+        # Compare locations (a lookup in the gazetteer's precomputed table)
+        location_similarity, location_reason = location_match(gazetteer, item_location, item_location_id,
+                                                              compare_item)
+        base_score += location_points(location_similarity)
         
         # Compare dates (proximity gives score)
+        date_diff = None
         if item_date:
             try:
                 compare_date = datetime.strptime(compare_item[compare_date_col], '%Y-%m-%d')
-                date_diff = abs((item_date - compare_date).days)
-                if date_diff <= 7:
-                    score += max(0, 10 - date_diff)  # 10 points for same day, decreasing by 1 per day
-                    reasons.append(f"Reported {date_diff} days apart")
+                days_apart = abs((item_date - compare_date).days)
+                if days_apart <= 7:
+                    date_diff = days_apart
+                    base_score += max(0, 10 - date_diff)  # 10 points for same day, decreasing by 1 per day
             except ValueError:
                 pass
         
-        # Only consider items with meaningful similarity score
-        if score >= 30:
-            similar_items.append({
-                'item': compare_item,
-                'score': score,
-                'reasons': reasons,
-                'item_type': 'found' if compare_table == 'found_items' else 'lost'
-            })
+        # Compare photos (fewer differing hash bits gives a higher score)
+        image_similarity = None
+        if compare_item['id'] in image_matches:
+            image_similarity = 1 - image_matches[compare_item['id']] / 64
+            base_score += int(image_similarity * 30)
+        
+        # The name can add at most 30 points
+        if cannot_qualify(base_score + 30):
+            pruned += 1
+            continue
+        
+        # Tighten the bound with difflib's cheap upper bounds on ratio():
+        # real_quick_ratio() >= quick_ratio() >= ratio()
+        name_matcher = difflib.SequenceMatcher(None, item_name, compare_item['item_name'].lower())
+        if cannot_qualify(base_score + name_points(name_matcher.real_quick_ratio())):
+            pruned += 1
+            continue
+        if cannot_qualify(base_score + name_points(name_matcher.quick_ratio())):
+            pruned += 1
+            continue
+        
+        # Compare item names (using difflib for similarity)
+        name_similarity = name_matcher.ratio()
+        score = base_score + name_points(name_similarity)
+        if cannot_qualify(score):
+            continue
+        
+        reasons = []
+        if same_category:
+            reasons.append(f"Same category: {item_category}")
+        if name_similarity > 0.6:
+            reasons.append(f"Similar name ({int(name_similarity * 100)}% match)")
+        if location_points(location_similarity):
+            reasons.append(location_reason)
+        if date_diff is not None:
+            reasons.append(f"Reported {date_diff} days apart")
+        if image_similarity is not None:
+            reasons.append(f"Similar photo ({int(image_similarity * 100)}% match)")
+        
+        match = {
+            'item': compare_item,
+            'score': score,
+            'reasons': reasons,
+            'item_type': 'found' if compare_table == 'found_items' else 'lost'
+        }
+        if len(top) < MATCH_LIMIT:
+            heapq.heappush(top, (score, -position, match))
+        else:
+            heapq.heapreplace(top, (score, -position, match))
     
-    # Sort by score descending
-    similar_items.sort(key=lambda x: x['score'], reverse=True)
+    with match_stats_lock:
+        match_stats['scans'] += 1
+        match_stats['candidates'] += len(compare_items)
+        match_stats['pruned'] += pruned
+    current_app.logger.debug('Match scan on %s: %d candidates, %d pruned', compare_table, len(compare_items), pruned)
     
-    # Return top 5 matches
-    return similar_items[:5]
+    # Sort by score descending, earlier (newer) items first on ties
+    return [match for score, neg_position, match in sorted(top, key=lambda entry: entry[:2], reverse=True)]
+
+# Rate limiting
+class MemoryRateLimitStore:
+    """Token buckets kept in this process only."""
+
+    # Idle buckets are swept once the store grows past this many keys
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now):
+        """Take one token from the bucket for key.
+
+        Returns 0 if the request is allowed, otherwise the number of seconds
+        until a token becomes available.
+        """
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens, retry_after = take_token(tokens, updated, capacity, rate, now)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._sweep(capacity, rate, now)
+            return retry_after
+
+    def _sweep(self, capacity, rate, now):
+        # A bucket that has refilled completely is the same as no bucket at all
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * rate >= capacity:
+                del self._buckets[key]
+
+
+class SQLiteRateLimitStore:
+    """Token buckets stored in the database so all workers share them."""
+
+    # Seconds between sweeps of buckets that have refilled completely
+    SWEEP_INTERVAL = 300
+
+    def __init__(self, database, busy_timeout):
+        # The rate_limits table is created by migrate_db()
+        self.database = database
+        self.busy_timeout = busy_timeout
+        self._next_sweep = 0
+
+    def consume(self, key, capacity, rate, now):
+        """Take one token from the bucket for key (see MemoryRateLimitStore).
+
+        Needs an app context. If the database stays locked through every retry
+        the request is let through rather than failed.
+        """
+        def work(conn):
+            # run_write_transaction reserves the write lock up front, so two
+            # workers cannot both spend the last token
+            row = conn.execute(
+                'SELECT tokens, updated_at FROM rate_limits WHERE bucket_key = ?', (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, retry_after = take_token(tokens, updated, capacity, rate, now)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (bucket_key, tokens, updated_at) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            if now >= self._next_sweep:
+                # A bucket that has refilled completely is the same as no row at all
+                conn.execute('DELETE FROM rate_limits WHERE tokens + (? - updated_at) * ? >= ?',
+                             (now, rate, capacity))
+                self._next_sweep = now + self.SWEEP_INTERVAL
+            return retry_after
+
+        conn = sqlite3.connect(self.database, timeout=self.busy_timeout)
+        try:
+            return run_write_transaction(conn, work)
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            current_app.logger.warning('Rate limit store is locked; not limiting %s', key)
+            return 0
+        finally:
+            conn.close()
+
+
+RATE_LIMIT_STORES = {
+    'memory': lambda app: MemoryRateLimitStore(),
+    'sqlite': lambda app: SQLiteRateLimitStore(app.config['DATABASE'], app.config['DATABASE_BUSY_TIMEOUT']),
+}
+
+
+def take_token(tokens, updated, capacity, rate, now):
+    """Refill a token bucket up to now and try to take one token from it.
+
+    Returns the new token count and the seconds to wait (0 if a token was taken).
+    """
+    tokens = min(capacity, tokens + max(0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / rate
+
+
+def get_rate_limit_store():
+    """Return the rate limit store selected by RATE_LIMIT_STORAGE, creating it once"""
+    store = current_app.extensions.get('rate_limit_store')
+    if store is None:
+        store = RATE_LIMIT_STORES[current_app.config['RATE_LIMIT_STORAGE']](current_app)
+        current_app.extensions['rate_limit_store'] = store
+    return store
+
+
+def too_many_requests(message, retry_after):
+    """Build a 429 response telling the client when to try again"""
+    retry_after = max(1, math.ceil(retry_after))
+    response = current_app.make_response((render_template('429.html', title='Too Many Requests',
+                                                  message=message, retry_after=retry_after), 429))
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def report_admission_control(f):
+    """Rate limit report submissions and cap concurrent match scans.
+
+    Only POST requests are limited; showing the report form stays cheap.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.method != 'POST':
+            return f(*args, **kwargs)
+
+        if 'user_id' in session:
+            client_key = f"user:{session['user_id']}"
+        else:
+            client_key = f"ip:{request.remote_addr}"
+        capacity = current_app.config['REPORT_RATE_LIMIT']
+        rate = capacity / current_app.config['REPORT_RATE_PERIOD']
+        retry_after = get_rate_limit_store().consume(f'report:{client_key}', capacity, rate, time.time())
+        if retry_after:
+            return too_many_requests('You are submitting reports too quickly. Please wait a moment and try again.',
+                                     retry_after)
+
+        # Shed load instead of letting worker threads queue up behind the database
+        # (create_app() sizes this semaphore from MATCH_CONCURRENCY_LIMIT)
+        match_slots = current_app.extensions['match_slots']
+        if not match_slots.acquire(timeout=current_app.config['MATCH_SLOT_TIMEOUT']):
+            return too_many_requests('The server is busy matching other reports. Please try again shortly.',
+                                     current_app.config['MATCH_RETRY_AFTER'])
+        try:
+            return f(*args, **kwargs)
+        finally:
+            match_slots.release()
+    return decorated_function
+
+# Live updates
+class EventBroker:
+    """In-process publish/subscribe for the /events streams.
+
+    Each subscriber gets a bounded queue. Events are either broadcast to every
+    subscriber or addressed to the streams of a single user.
+    """
+
+    # Sent to a stream that was replaced by a newer one of the same user
+    CLOSED = 'event: closed\ndata: {}\n\n'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # queue -> user_id, oldest first
+
+    def subscribe(self, user_id, max_connections, max_per_user, queue_size):
+        """Register a new stream, or return None if the global connection limit is reached.
+
+        A user at max_per_user loses their oldest stream instead: a closed tab
+        is only noticed at the next heartbeat, and EventSource gives up for good
+        when a reconnect is refused.
+        """
+        with self._lock:
+            own = [events for events, owner in self._subscribers.items() if owner == user_id]
+            for events in own[:max(0, len(own) - max_per_user + 1)]:
+                del self._subscribers[events]
+                try:
+                    events.put_nowait(self.CLOSED)
+                except queue.Full:
+                    # The page must get CLOSED or it reconnects and replaces
+                    # the next stream, so drop the events it hasn't read
+                    try:
+                        while True:
+                            events.get_nowait()
+                    except queue.Empty:
+                        pass
+                    events.put_nowait(self.CLOSED)
+            if len(self._subscribers) >= max_connections:
+                return None
+            events = queue.Queue(maxsize=queue_size)
+            self._subscribers[events] = user_id
+            return events
+
+    def unsubscribe(self, events):
+        with self._lock:
+            self._subscribers.pop(events, None)
+
+    def is_subscribed(self, events):
+        with self._lock:
+            return events in self._subscribers
+
+    def publish(self, event, data, user_id=None):
+        """Send an event to everyone, or only to user_id's streams"""
+        message = f'event: {event}\ndata: {json.dumps(data)}\n\n'
+        with self._lock:
+            for events, owner in list(self._subscribers.items()):
+                if user_id is not None and owner != user_id:
+                    continue
+                try:
+                    events.put_nowait(message)
+                except queue.Full:
+                    # Drop clients that stopped reading; EventSource reconnects
+                    # and the user reloads the page to catch up
+                    del self._subscribers[events]
+
+def publish_new_item(item_type, item_id, item_data, similar_items):
+    """Tell connected users about a new report and about matches for their own reports"""
+    view_endpoint = 'main.view_lost_item' if item_type == 'lost' else 'main.view_found_item'
+    event_broker = current_app.extensions['event_broker']
+    event_broker.publish('new_item', {
+        'item_type': item_type,
+        'id': item_id,
+        'item_name': item_data['item_name'],
+        'category': item_data['category'],
+        'location': item_data['location'],
+        'url': url_for(view_endpoint, item_id=item_id),
+    })
+
+    for match in similar_items:
+        owner = match['item']['user_id']
+        if owner is None or owner == session.get('user_id'):
+            continue
+        event_broker.publish('match', {
+            'item_type': item_type,
+            'id': item_id,
+            'item_name': item_data['item_name'],
+            'your_item_name': match['item']['item_name'],
+            'score': match['score'],
+            'url': url_for(view_endpoint, item_id=item_id),
+        }, user_id=owner)
+
+# Claims and status changes
+# Archived items are closed out: hidden from the item lists and never matched
+ITEM_STATUSES = ('unclaimed', 'claimed', 'returned', 'archived')
+
+def claim_item(db, item_type, item_id, claimant_name, claimant_email, claimant_phone, claim_description):
+    """Claim an unclaimed item. Returns False if it was already claimed (or is gone)."""
+    table = 'lost_items' if item_type == 'lost' else 'found_items'
+
+    def work(db):
+        cursor = db.execute(
+            f'UPDATE {table} SET status = "claimed", updated_at = CURRENT_TIMESTAMP '
+            'WHERE id = ? AND status = "unclaimed"',
+            (item_id,)
+        )
+        if cursor.rowcount == 0:
+            return False
+        db.execute(
+            '''INSERT INTO claims 
+               (item_type, item_id, claimant_name, claimant_email, 
+                claimant_phone, claim_description)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (item_type, item_id, claimant_name, claimant_email,
+             claimant_phone, claim_description)
+        )
+        return True
+
+    return run_write_transaction(db, work)
+
+def set_item_status(db, item_type, item_id, new_status, expected_status=None):
+    """Change an item's status. Returns False if the item is gone, or if
+    expected_status is given and the item no longer has that status."""
+    table = 'lost_items' if item_type == 'lost' else 'found_items'
+
+    def work(db):
+        if expected_status is None:
+            cursor = db.execute(
+                f'UPDATE {table} SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                (new_status, item_id)
+            )
+        else:
+            cursor = db.execute(
+                f'UPDATE {table} SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ?',
+                (new_status, item_id, expected_status)
+            )
+        return cursor.rowcount > 0
+
+    return run_write_transaction(db, work)
+
+def group_selected_items(values):
+    """Turn "lost:12:unclaimed"-style checkbox values into
+    {'lost_items': [(12, 'unclaimed'), ...], 'found_items': [...]}.
+
+    The status is the one the admin saw on the dashboard. Values that aren't a
+    valid item type, id and status are ignored.
+    """
+    selected = {'lost_items': [], 'found_items': []}
+    for value in values:
+        item_type, item_id, status = (value.split(':') + ['', ''])[:3]
+        if item_type in ('lost', 'found') and item_id.isdigit() and status in ITEM_STATUSES:
+            selected[f'{item_type}_items'].append((int(item_id), status))
+    return selected
+
+def still_unchanged(db, table, items):
+    """Return the (id, status) pairs whose item still has that status"""
+    if not items:
+        return []
+    placeholders = ','.join('?' * len(items))
+    current = dict(db.execute(f'SELECT id, status FROM {table} WHERE id IN ({placeholders})',
+                              [item_id for item_id, _ in items]).fetchall())
+    return [(item_id, status) for item_id, status in items if current.get(item_id) == status]
+
+def bulk_set_status(db, selected, new_status):
+    """Set the status of many items in one transaction.
+
+    Like set_item_status, an item only changes if it still has the status the
+    admin saw, so a claim made after the dashboard loaded isn't overwritten.
+    Returns the (item_type, id) pairs that changed.
+    """
+    def work(db):
+        changed = []
+        for table, items in selected.items():
+            item_type = 'lost' if table == 'lost_items' else 'found'
+            unchanged = still_unchanged(db, table, items)
+            db.executemany(
+                f'UPDATE {table} SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND status = ?',
+                [(new_status, item_id, status) for item_id, status in unchanged]
+            )
+            changed += [(item_type, item_id) for item_id, _ in unchanged]
+        return changed
+
+    return run_write_transaction(db, work)
+
+def bulk_delete(db, selected):
+    """Delete many items and their claims in one transaction.
+
+    Items whose status changed since the admin saw them are left alone.
+    Returns the (item_type, id) pairs that were deleted.
+    """
+    def work(db):
+        deleted = []
+        for table, items in selected.items():
+            item_type = 'lost' if table == 'lost_items' else 'found'
+            unchanged = still_unchanged(db, table, items)
+            db.executemany('DELETE FROM claims WHERE item_type = ? AND item_id = ?',
+                           [(item_type, item_id) for item_id, _ in unchanged])
+            db.executemany(f'DELETE FROM {table} WHERE id = ? AND status = ?', unchanged)
+            deleted += [(item_type, item_id) for item_id, _ in unchanged]
+        return deleted
+
+    return run_write_transaction(db, work)
+
+# Streamed pages
+# Pages with long item lists are sent while they render instead of being built
+# in memory first, so the browser gets the page header right away and the
+# worker never holds the whole result set or HTML string.
+STREAM_CHUNK_SIZE = 8 * 1024  # Bytes of HTML collected before each write
+
+class LazyRows:
+    """Query results read from the cursor one row at a time while a template loops over them.
+
+    Truthy if the query returned any rows, so templates can keep using
+    {% if items %}. Can only be looped over once.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._first = cursor.fetchone()
+
+    def __bool__(self):
+        return self._first is not None
+
+    def __iter__(self):
+        if self._first is None:
+            return
+        yield self._first
+        yield from self._cursor
+
+
+def stream_page(db, template_name, **context):
+    """Stream a template in chunks of about STREAM_CHUNK_SIZE bytes, then close db"""
+    # Read flashed messages now: the session cookie is sent before the body,
+    # so removing them from the session while streaming would be too late
+    get_flashed_messages(with_categories=True)
+    # Called here, while the request is active, so it keeps the request context for the template
+    pieces = stream_template(template_name, **context)
+
+    def chunks():
+        buffer = []
+        size = 0
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= STREAM_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer)
+
+    response = Response(chunks(), mimetype='text/html')
+    response.call_on_close(db.close)
+    return response
 
 # Authentication decorators
 def login_required(f):
@@ -155,7 +1408,7 @@ def login_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             flash('Please login to access this page.', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -164,15 +1417,15 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             flash('Please login to access this page.', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         if session.get('user_role') != 'admin':
             flash('Admin access required.', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         return f(*args, **kwargs)
     return decorated_function
 
 # Authentication routes
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     """Login page with admin and user options"""
     if request.method == 'POST':
@@ -196,7 +1449,7 @@ def login():
                 session['full_name'] = user['full_name']
                 
                 flash(f'Welcome back, {user["full_name"]}!', 'success')
-                return redirect(url_for('index'))
+                return redirect(url_for('main.index'))
             
             # For other users, check if password matches stored format
             elif stored_password.endswith('_hash'):
@@ -209,13 +1462,13 @@ def login():
                     session['full_name'] = user['full_name']
                     
                     flash(f'Welcome back, {user["full_name"]}!', 'success')
-                    return redirect(url_for('index'))
+                    return redirect(url_for('main.index'))
         
         flash('Invalid username or password!', 'error')
     
     return render_template('login.html')
 
-@app.route('/signup', methods=['GET', 'POST'])
+@bp.route('/signup', methods=['GET', 'POST'])
 def signup():
     """User registration page"""
     if request.method == 'POST':
@@ -267,20 +1520,20 @@ def signup():
         db.commit()
         
         flash('Registration successful! Please login with your new account.', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     return render_template('signup.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     """Logout route"""
     session.clear()
     flash('You have been logged out successfully.', 'success')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
 # Routes
 
-@app.route('/')
+@bp.route('/')
 @login_required
 def index():
     """Home page - show overview of lost and found items"""
@@ -300,7 +1553,7 @@ def index():
     lost_count = db.execute('SELECT COUNT(*) FROM lost_items WHERE status = "unclaimed"').fetchone()[0]
     found_count = db.execute('SELECT COUNT(*) FROM found_items WHERE status = "unclaimed"').fetchone()[0]
     claimed_count = db.execute(
-        'SELECT COUNT(*) FROM lost_items WHERE status = "claimed" UNION '
+        'SELECT COUNT(*) FROM lost_items WHERE status = "claimed" UNION ALL '
         'SELECT COUNT(*) FROM found_items WHERE status = "claimed"'
     ).fetchall()
     total_claimed = sum(row[0] for row in claimed_count)
@@ -312,28 +1565,66 @@ def index():
                          found_count=found_count,
                          claimed_count=total_claimed)
 
-@app.route('/lost')
+@bp.route('/lost')
 @login_required
 def list_lost():
     """List all lost items"""
     db = get_db()
-    items = db.execute(
-        'SELECT * FROM lost_items ORDER BY created_at DESC'
-    ).fetchall()
-    return render_template('lost_items.html', items=items, title='Lost Items')
+    items = LazyRows(db.execute(
+        'SELECT * FROM lost_items WHERE status != "archived" ORDER BY created_at DESC'
+    ))
+    return stream_page(db, 'lost_items.html', items=items, title='Lost Items')
 
-@app.route('/found')
+@bp.route('/found')
 @login_required
 def list_found():
     """List all found items"""
     db = get_db()
-    items = db.execute(
-        'SELECT * FROM found_items ORDER BY created_at DESC'
-    ).fetchall()
-    return render_template('found_items.html', items=items, title='Found Items')
+    items = LazyRows(db.execute(
+        'SELECT * FROM found_items WHERE status != "archived" ORDER BY created_at DESC'
+    ))
+    return stream_page(db, 'found_items.html', items=items, title='Found Items')
 
-@app.route('/report/lost', methods=['GET', 'POST'])
+@bp.route('/events')
 @login_required
+def events():
+    """Server-Sent Events stream of new items and matches for the user's reports"""
+    event_broker = current_app.extensions['event_broker']
+    subscription = event_broker.subscribe(session['user_id'],
+                                          current_app.config['EVENT_STREAM_MAX_CONNECTIONS'],
+                                          current_app.config['EVENT_STREAM_MAX_PER_USER'],
+                                          current_app.config['EVENT_STREAM_QUEUE_SIZE'])
+    if subscription is None:
+        return too_many_requests('Too many live update connections are open. Please try again later.', 30)
+
+    heartbeat = current_app.config['EVENT_STREAM_HEARTBEAT']
+
+    def stream():
+        try:
+            # Ask the browser to wait a little before reconnecting
+            yield 'retry: 5000\n\n'
+            while True:
+                # Read the queue before checking the subscription so a replaced
+                # stream still sends the CLOSED event waiting for it
+                try:
+                    message = subscription.get(timeout=heartbeat)
+                except queue.Empty:
+                    if not event_broker.is_subscribed(subscription):
+                        break  # Dropped for falling behind; EventSource reconnects
+                    yield ': heartbeat\n\n'
+                    continue
+                yield message
+                if message == EventBroker.CLOSED:
+                    break
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/report/lost', methods=['GET', 'POST'])
+@login_required
+@report_admission_control
 def report_lost():
     """Report a lost item"""
     if request.method == 'POST':
@@ -348,24 +1639,19 @@ def report_lost():
         contact_phone = request.form.get('contact_phone', '')
         
         # Handle file upload
-        image_filename = None
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and allowed_file(file.filename):
-                # Generate unique filename
-                filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                image_filename = filename
+        image_filename, image_hash = save_upload(request.files.get('image'))
         
         # Insert into database
         db = get_db()
-        db.execute(
+        # Resolve the free-text location to a known campus location once, here
+        location_id = get_gazetteer(db).resolve(location)
+        cursor = db.execute(
             '''INSERT INTO lost_items 
-               (item_name, category, description, lost_date, location, 
-                contact_name, contact_email, contact_phone, image_filename, user_id)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-            (item_name, category, description, lost_date, location, 
-             contact_name, contact_email, contact_phone, image_filename, session['user_id'])
+               (item_name, category, description, lost_date, location, location_id,
+                contact_name, contact_email, contact_phone, image_filename, image_hash, user_id)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (item_name, category, description, lost_date, location, location_id,
+             contact_name, contact_email, contact_phone, image_filename, image_hash, session['user_id'])
         )
         db.commit()
         
@@ -374,9 +1660,12 @@ def report_lost():
             'item_name': item_name,
             'category': category,
             'location': location,
-            'lost_date': lost_date
+            'location_id': location_id,
+            'lost_date': lost_date,
+            'image_hash': image_hash
         }
         similar_items = find_similar_items('lost', item_data)
+        publish_new_item('lost', cursor.lastrowid, item_data, similar_items)
         
         if similar_items:
             flash('Lost item reported successfully! We found some similar unclaimed found items that might be yours.', 'success')
@@ -387,12 +1676,13 @@ def report_lost():
                                 title='Similar Found Items')
         else:
             flash('Lost item reported successfully!', 'success')
-            return redirect(url_for('list_lost'))
+            return redirect(url_for('main.list_lost'))
     
     return render_template('report_lost.html')
 
-@app.route('/report/found', methods=['GET', 'POST'])
+@bp.route('/report/found', methods=['GET', 'POST'])
 @login_required
+@report_admission_control
 def report_found():
     """Report a found item"""
     if request.method == 'POST':
@@ -407,24 +1697,19 @@ def report_found():
         contact_phone = request.form.get('contact_phone', '')
         
         # Handle file upload
-        image_filename = None
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and allowed_file(file.filename):
-                # Generate unique filename
-                filename = str(uuid.uuid4()) + '.' + file.filename.rsplit('.', 1)[1].lower()
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                image_filename = filename
+        image_filename, image_hash = save_upload(request.files.get('image'))
         
         # Insert into database
         db = get_db()
-        db.execute(
+        # Resolve the free-text location to a known campus location once, here
+        location_id = get_gazetteer(db).resolve(location)
+        cursor = db.execute(
             '''INSERT INTO found_items 
-               (item_name, category, description, found_date, location, 
-                contact_name, contact_email, contact_phone, image_filename, user_id)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-            (item_name, category, description, found_date, location, 
-             contact_name, contact_email, contact_phone, image_filename, session['user_id'])
+               (item_name, category, description, found_date, location, location_id,
+                contact_name, contact_email, contact_phone, image_filename, image_hash, user_id)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (item_name, category, description, found_date, location, location_id,
+             contact_name, contact_email, contact_phone, image_filename, image_hash, session['user_id'])
         )
         db.commit()
         
@@ -433,9 +1718,12 @@ def report_found():
             'item_name': item_name,
             'category': category,
             'location': location,
-            'found_date': found_date
+            'location_id': location_id,
+            'found_date': found_date,
+            'image_hash': image_hash
         }
         similar_items = find_similar_items('found', item_data)
+        publish_new_item('found', cursor.lastrowid, item_data, similar_items)
         
         if similar_items:
             flash('Found item reported successfully! We found some similar unclaimed lost items that might match what you found.', 'success')
@@ -446,11 +1734,11 @@ def report_found():
                                 title='Similar Lost Items')
         else:
             flash('Found item reported successfully!', 'success')
-            return redirect(url_for('list_found'))
+            return redirect(url_for('main.list_found'))
     
     return render_template('report_found.html')
 
-@app.route('/item/lost/<int:item_id>')
+@bp.route('/item/lost/<int:item_id>')
 @login_required
 def view_lost_item(item_id):
     """View details of a specific lost item"""
@@ -461,11 +1749,11 @@ def view_lost_item(item_id):
     
     if item is None:
         flash('Item not found!', 'error')
-        return redirect(url_for('list_lost'))
+        return redirect(url_for('main.list_lost'))
     
     return render_template('view_lost_item.html', item=item)
 
-@app.route('/item/found/<int:item_id>')
+@bp.route('/item/found/<int:item_id>')
 @login_required
 def view_found_item(item_id):
     """View details of a specific found item"""
@@ -476,11 +1764,11 @@ def view_found_item(item_id):
     
     if item is None:
         flash('Item not found!', 'error')
-        return redirect(url_for('list_found'))
+        return redirect(url_for('main.list_found'))
     
     return render_template('view_found_item.html', item=item)
 
-@app.route('/claim/lost/<int:item_id>', methods=['GET', 'POST'])
+@bp.route('/claim/lost/<int:item_id>', methods=['GET', 'POST'])
 @login_required
 def claim_lost_item(item_id):
     """Claim a lost item"""
@@ -491,7 +1779,7 @@ def claim_lost_item(item_id):
     
     if item is None:
         flash('Item not found!', 'error')
-        return redirect(url_for('list_lost'))
+        return redirect(url_for('main.list_lost'))
     
     if request.method == 'POST':
         claimant_name = request.form['claimant_name']
@@ -499,29 +1787,20 @@ def claim_lost_item(item_id):
         claimant_phone = request.form.get('claimant_phone', '')
         claim_description = request.form.get('claim_description', '')
         
-        # Insert claim record
-        db.execute(
-            '''INSERT INTO claims 
-               (item_type, item_id, claimant_name, claimant_email, 
-                claimant_phone, claim_description)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            ('lost', item_id, claimant_name, claimant_email, 
-             claimant_phone, claim_description)
-        )
-        
-        # Update item status
-        db.execute(
-            'UPDATE lost_items SET status = "claimed", updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-            (item_id,)
-        )
-        db.commit()
+        # Mark the item claimed and record the claim in one transaction. The
+        # status check in the UPDATE means only the first of several
+        # simultaneous claimers succeeds.
+        if not claim_item(db, 'lost', item_id, claimant_name, claimant_email,
+                          claimant_phone, claim_description):
+            flash('Sorry, this item has already been claimed.', 'error')
+            return redirect(url_for('main.list_lost'))
         
         flash('Item claimed successfully! We will contact you soon.', 'success')
-        return redirect(url_for('list_lost'))
+        return redirect(url_for('main.list_lost'))
     
     return render_template('claim_item.html', item=item, item_type='lost')
 
-@app.route('/claim/found/<int:item_id>', methods=['GET', 'POST'])
+@bp.route('/claim/found/<int:item_id>', methods=['GET', 'POST'])
 @login_required
 def claim_found_item(item_id):
     """Claim a found item"""
@@ -532,7 +1811,7 @@ def claim_found_item(item_id):
     
     if item is None:
         flash('Item not found!', 'error')
-        return redirect(url_for('list_found'))
+        return redirect(url_for('main.list_found'))
     
     if request.method == 'POST':
         claimant_name = request.form['claimant_name']
@@ -540,29 +1819,20 @@ def claim_found_item(item_id):
         claimant_phone = request.form.get('claimant_phone', '')
         claim_description = request.form.get('claim_description', '')
         
-        # Insert claim record
-        db.execute(
-            '''INSERT INTO claims 
-               (item_type, item_id, claimant_name, claimant_email, 
-                claimant_phone, claim_description)
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            ('found', item_id, claimant_name, claimant_email, 
-             claimant_phone, claim_description)
-        )
-        
-        # Update item status
-        db.execute(
-            'UPDATE found_items SET status = "claimed", updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-            (item_id,)
-        )
-        db.commit()
+        # Mark the item claimed and record the claim in one transaction. The
+        # status check in the UPDATE means only the first of several
+        # simultaneous claimers succeeds.
+        if not claim_item(db, 'found', item_id, claimant_name, claimant_email,
+                          claimant_phone, claim_description):
+            flash('Sorry, this item has already been claimed.', 'error')
+            return redirect(url_for('main.list_found'))
         
         flash('Item claimed successfully! We will contact you soon.', 'success')
-        return redirect(url_for('list_found'))
+        return redirect(url_for('main.list_found'))
     
     return render_template('claim_item.html', item=item, item_type='found')
 
-@app.route('/delete/lost/<int:item_id>', methods=['POST'])
+@bp.route('/delete/lost/<int:item_id>', methods=['POST'])
 @login_required
 def delete_lost(item_id):
     """Delete a lost item (only admin or item reporter can delete)"""
@@ -573,21 +1843,21 @@ def delete_lost(item_id):
     
     if not item:
         flash('Item not found!', 'error')
-        return redirect(url_for('list_lost'))
+        return redirect(url_for('main.list_lost'))
     
     # Check if user is admin or the one who reported it
     if session['user_role'] != 'admin' and session['user_id'] != item['user_id']:
         flash('You do not have permission to delete this item.', 'error')
-        return redirect(url_for('list_lost'))
+        return redirect(url_for('main.list_lost'))
     
     # Delete the item
     db.execute('DELETE FROM lost_items WHERE id = ?', (item_id,))
     db.commit()
     
     flash('Lost item deleted successfully!', 'success')
-    return redirect(url_for('list_lost'))
+    return redirect(url_for('main.list_lost'))
 
-@app.route('/delete/found/<int:item_id>', methods=['POST'])
+@bp.route('/delete/found/<int:item_id>', methods=['POST'])
 @login_required
 def delete_found(item_id):
     """Delete a found item (only admin or item reporter can delete)"""
@@ -598,32 +1868,55 @@ def delete_found(item_id):
     
     if not item:
         flash('Item not found!', 'error')
-        return redirect(url_for('list_found'))
+        return redirect(url_for('main.list_found'))
     
     # Check if user is admin or the one who reported it
     if session['user_role'] != 'admin' and session['user_id'] != item['user_id']:
         flash('You do not have permission to delete this item.', 'error')
-        return redirect(url_for('list_found'))
+        return redirect(url_for('main.list_found'))
     
     # Delete the item
     db.execute('DELETE FROM found_items WHERE id = ?', (item_id,))
     db.commit()
     
     flash('Found item deleted successfully!', 'success')
-    return redirect(url_for('list_found'))
+    return redirect(url_for('main.list_found'))
+
+def dashboard_stats(db):
+    """Counts shown at the top of the admin dashboard"""
+    return {
+        'unclaimed_lost': db.execute('SELECT COUNT(*) FROM lost_items WHERE status = "unclaimed"').fetchone()[0],
+        'unclaimed_found': db.execute('SELECT COUNT(*) FROM found_items WHERE status = "unclaimed"').fetchone()[0],
+        'pending_claims': db.execute('SELECT COUNT(*) FROM claims WHERE status = "pending"').fetchone()[0],
+        'total_items': db.execute(
+            'SELECT (SELECT COUNT(*) FROM lost_items) + (SELECT COUNT(*) FROM found_items)'
+        ).fetchone()[0],
+    }
 
-@app.route('/admin')
+@bp.route('/admin')
 @admin_required
 def admin():
     """Admin dashboard - view all items and claims"""
     db = get_db()
     
-    # Get all items with their status
-    lost_items = db.execute('SELECT * FROM lost_items ORDER BY created_at DESC').fetchall()
-    found_items = db.execute('SELECT * FROM found_items ORDER BY created_at DESC').fetchall()
+    # Get statistics
+    stats = dashboard_stats(db)
+    
+    # Get all items with their status and the latest claim on each
+    lost_items, found_items = (LazyRows(db.execute(f'''
+        SELECT i.*, c.claimant_name, c.claimant_email, c.claimant_phone, c.claim_description,
+               c.created_at AS claimed_at
+        FROM {table} i
+        LEFT JOIN claims c ON c.id = (
+            SELECT id FROM claims
+            WHERE item_type = ? AND item_id = i.id
+            ORDER BY created_at DESC LIMIT 1
+        )
+        ORDER BY i.created_at DESC
+    ''', (item_type,))) for table, item_type in (('lost_items', 'lost'), ('found_items', 'found')))
     
     # Get detailed claims information
-    claims = db.execute('''
+    claims = LazyRows(db.execute('''
         SELECT c.*, 
                CASE 
                    WHEN c.item_type = 'lost' THEN l.item_name
@@ -641,68 +1934,92 @@ def admin():
         LEFT JOIN lost_items l ON c.item_id = l.id AND c.item_type = 'lost'
         LEFT JOIN found_items f ON c.item_id = f.id AND c.item_type = 'found'
         ORDER BY c.created_at DESC
-    ''').fetchall()
-    
-    # Get detailed item information with claims
-    detailed_lost_items = []
-    for item in lost_items:
-        item_info = dict(item)
-        # Get claim information for this item
-        claim_info = db.execute('''
-            SELECT claimant_name, claimant_email, claimant_phone, claim_description, status, created_at
-            FROM claims 
-            WHERE item_type = 'lost' AND item_id = ?
-            ORDER BY created_at DESC
-        ''', (item['id'],)).fetchone()
-        
-        item_info['claim_info'] = claim_info
-        detailed_lost_items.append(item_info)
-    
-    detailed_found_items = []
-    for item in found_items:
-        item_info = dict(item)
-        # Get claim information for this item
-        claim_info = db.execute('''
-            SELECT claimant_name, claimant_email, claimant_phone, claim_description, status, created_at
-            FROM claims 
-            WHERE item_type = 'found' AND item_id = ?
-            ORDER BY created_at DESC
-        ''', (item['id'],)).fetchone()
-        
-        item_info['claim_info'] = claim_info
-        detailed_found_items.append(item_info)
-    
-    return render_template('admin.html', 
-                         lost_items=detailed_lost_items, 
-                         found_items=detailed_found_items, 
-                         claims=claims)
-
-@app.route('/admin/update_status', methods=['POST'])
+    '''))
+    
+    return stream_page(db, 'admin.html',
+                       stats=stats,
+                       lost_items=lost_items,
+                       found_items=found_items,
+                       claims=claims)
+
+@bp.route('/admin/update_status', methods=['POST'])
 @admin_required
 def update_status():
     """Update item status (admin only)"""
     item_type = request.form['item_type']
     item_id = request.form['item_id']
     new_status = request.form['status']
+    # The status the admin saw; if someone changed it since, don't overwrite
+    current_status = request.form.get('current_status') or None
     
-    db = get_db()
+    if item_type not in ('lost', 'found') or new_status not in ITEM_STATUSES:
+        flash('Invalid status update.', 'error')
+        return redirect(url_for('main.admin'))
     
-    if item_type == 'lost':
-        db.execute(
-            'UPDATE lost_items SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-            (new_status, item_id)
-        )
-    elif item_type == 'found':
-        db.execute(
-            'UPDATE found_items SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
-            (new_status, item_id)
-        )
-    
-    db.commit()
-    flash('Item status updated successfully!', 'success')
-    return redirect(url_for('admin'))
+    db = get_db()
+    if set_item_status(db, item_type, item_id, new_status, current_status):
+        flash('Item status updated successfully!', 'success')
+    else:
+        flash('The item was changed or deleted by someone else. Please check it and try again.', 'error')
+    return redirect(url_for('main.admin'))
+
+# Bulk admin actions
+# The dashboard posts the selected items as "lost:12:unclaimed" values of an
+# "items" field, each with the status the admin saw. Each action runs as one
+# transaction, skips items that changed in the meantime and answers with a
+# short summary (JSON for the dashboard's script) instead of reloading the
+# dashboard.
+def bulk_result(message, category, selected_count, changed, status=200):
+    """Report the outcome of a bulk action as JSON, or as a flash message for plain form posts.
+
+    changed holds the (item_type, id) pairs the action changed.
+    """
+    skipped = selected_count - len(changed)
+    if skipped:
+        message += f' {skipped} changed since the dashboard loaded or no longer exist.'
+        category = 'info'
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({'message': message, 'category': category,
+                        'selected': selected_count, 'changed': len(changed),
+                        'items': [f'{item_type}:{item_id}' for item_type, item_id in changed],
+                        'stats': dashboard_stats(get_db())}), status
+    flash(message, category)
+    return redirect(url_for('main.admin'))
+
+@bp.route('/admin/bulk/status', methods=['POST'])
+@admin_required
+def bulk_update_status():
+    """Change the status of all selected items (admin only)"""
+    new_status = request.form.get('status')
+    if new_status not in ITEM_STATUSES:
+        return bulk_result('Invalid status update.', 'error', 0, [], 400)
+    selected = group_selected_items(request.form.getlist('items'))
+    selected_count = sum(len(items) for items in selected.values())
+    changed = bulk_set_status(get_db(), selected, new_status)
+    return bulk_result(f'Set {len(changed)} of {selected_count} selected items to {new_status}.', 'success',
+                       selected_count, changed)
+
+@bp.route('/admin/bulk/archive', methods=['POST'])
+@admin_required
+def bulk_archive():
+    """Archive all selected items (admin only)"""
+    selected = group_selected_items(request.form.getlist('items'))
+    selected_count = sum(len(items) for items in selected.values())
+    changed = bulk_set_status(get_db(), selected, 'archived')
+    return bulk_result(f'Archived {len(changed)} of {selected_count} selected items.', 'success',
+                       selected_count, changed)
 
-@app.route('/admin/edit/lost/<int:item_id>', methods=['GET', 'POST'])
+@bp.route('/admin/bulk/delete', methods=['POST'])
+@admin_required
+def bulk_delete_items():
+    """Delete all selected items and their claims (admin only)"""
+    selected = group_selected_items(request.form.getlist('items'))
+    selected_count = sum(len(items) for items in selected.values())
+    deleted = bulk_delete(get_db(), selected)
+    return bulk_result(f'Deleted {len(deleted)} of {selected_count} selected items.', 'success',
+                       selected_count, deleted)
+
+@bp.route('/admin/edit/lost/<int:item_id>', methods=['GET', 'POST'])
 @admin_required
 def edit_lost_item(item_id):
     """Edit a lost item (admin only)"""
@@ -723,16 +2040,16 @@ def edit_lost_item(item_id):
         db.execute(
             '''UPDATE lost_items 
                SET item_name = ?, category = ?, description = ?, lost_date = ?, 
-                   location = ?, contact_name = ?, contact_email = ?, contact_phone = ?,
+                   location = ?, location_id = ?, contact_name = ?, contact_email = ?, contact_phone = ?,
                    updated_at = CURRENT_TIMESTAMP
                WHERE id = ?''',
-            (item_name, category, description, lost_date, location, 
+            (item_name, category, description, lost_date, location, get_gazetteer(db).resolve(location),
              contact_name, contact_email, contact_phone, item_id)
         )
         db.commit()
         
         flash('Lost item updated successfully!', 'success')
-        return redirect(url_for('admin'))
+        return redirect(url_for('main.admin'))
     
     # Get item data for form
     item = db.execute(
@@ -741,11 +2058,11 @@ def edit_lost_item(item_id):
     
     if item is None:
         flash('Item not found!', 'error')
-        return redirect(url_for('admin'))
+        return redirect(url_for('main.admin'))
     
     return render_template('edit_lost_item.html', item=item)
 
-@app.route('/admin/edit/found/<int:item_id>', methods=['GET', 'POST'])
+@bp.route('/admin/edit/found/<int:item_id>', methods=['GET', 'POST'])
 @admin_required
 def edit_found_item(item_id):
     """Edit a found item (admin only)"""
@@ -766,16 +2083,16 @@ def edit_found_item(item_id):
         db.execute(
             '''UPDATE found_items 
                SET item_name = ?, category = ?, description = ?, found_date = ?, 
-                   location = ?, contact_name = ?, contact_email = ?, contact_phone = ?,
+                   location = ?, location_id = ?, contact_name = ?, contact_email = ?, contact_phone = ?,
                    updated_at = CURRENT_TIMESTAMP
                WHERE id = ?''',
-            (item_name, category, description, found_date, location, 
+            (item_name, category, description, found_date, location, get_gazetteer(db).resolve(location),
              contact_name, contact_email, contact_phone, item_id)
         )
         db.commit()
         
         flash('Found item updated successfully!', 'success')
-        return redirect(url_for('admin'))
+        return redirect(url_for('main.admin'))
     
     # Get item data for form
     item = db.execute(
@@ -784,11 +2101,11 @@ def edit_found_item(item_id):
     
     if item is None:
         flash('Item not found!', 'error')
-        return redirect(url_for('admin'))
+        return redirect(url_for('main.admin'))
     
     return render_template('edit_found_item.html', item=item)
 
-@app.route('/admin/delete/lost/<int:item_id>', methods=['POST'])
+@bp.route('/admin/delete/lost/<int:item_id>', methods=['POST'])
 @admin_required
 def delete_lost_item(item_id):
     """Delete a lost item (admin only)"""
@@ -802,9 +2119,9 @@ def delete_lost_item(item_id):
     db.commit()
     
     flash('Lost item deleted successfully!', 'success')
-    return redirect(url_for('admin'))
+    return redirect(url_for('main.admin'))
 
-@app.route('/admin/delete/found/<int:item_id>', methods=['POST'])
+@bp.route('/admin/delete/found/<int:item_id>', methods=['POST'])
 @admin_required
 def delete_found_item(item_id):
     """Delete a found item (admin only)"""
@@ -818,10 +2135,10 @@ def delete_found_item(item_id):
     db.commit()
     
     flash('Found item deleted successfully!', 'success')
-    return redirect(url_for('admin'))
+    return redirect(url_for('main.admin'))
 
 
-@app.route('/custom_404')
+@bp.route('/custom_404')
 def custom_404():
     """Custom 404 page with Easter egg - shows MILTON when clicked twice"""
     # Track click count in session
@@ -840,12 +2157,16 @@ def custom_404():
     return render_template('404.html', title='404 Not Found')
 
 
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def page_not_found(e):
     """Handle regular 404 errors"""
     return render_template('404.html', title='404 Not Found'), 404
 
+_IMPORT_DURATION = time.perf_counter() - _IMPORT_STARTED
+
 if __name__ == '__main__':
+    app = create_app()
     # Initialize database if it doesn't exist
-    init_db()
+    with app.app_context():
+        init_db()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Shared pytest fixtures
+
+Each test gets the app on a freshly migrated database in its own temporary
+directory, which pytest cleans up.
+"""
+
+import pytest
+
+import app as lost_and_found
+
+
+@pytest.fixture()
+def app(tmp_path):
+    database = str(tmp_path / 'test.db')
+    lost_and_found.migrate_db(database)
+    return lost_and_found.create_app({
+        'DATABASE': database,
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'JINJA_BYTECODE_CACHE_DIR': False,
+    })
+
+
+@pytest.fixture()
+def db(app):
+    """A connection to the test database, with an app context active for the whole test"""
+    with app.app_context():
+        db = lost_and_found.get_db()
+        yield db
+        db.close()
+
+
+def log_in(client, user_id=1, username='admin', role='admin'):
+    """Give a test client the session a logged-in user would have"""
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['username'] = username
+        session['user_role'] = role
+    return client
+
+
+@pytest.fixture()
+def admin_client(app):
+    return log_in(app.test_client())
@@ -0,0 +1,460 @@
+"""
+Load testing script for the Lost and Found Management System
+
+Simulates many users at once - logging in, browsing the item lists, reporting
+items with photos, claiming items and using the admin dashboard - and reports
+throughput, latency percentiles and errors such as SQLite's
+"database is locked".
+
+By default the app runs in this process against a throwaway copy of the
+database, so nothing real is changed:
+
+    python load_test.py --concurrency 20 --duration 30
+
+It can also drive a running server (which WILL change that server's data):
+
+    python load_test.py --url http://127.0.0.1:5000 --concurrency 20
+
+--bulk-benchmark N instead times an admin closing out N items with one
+request per item against a single bulk request (in-process only):
+
+    python load_test.py --bulk-benchmark 500
+"""
+
+import argparse
+import http.cookiejar
+import os
+import random
+import re
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from io import BytesIO
+
+# Relative weights of what a simulated user does next
+ACTIONS = {
+    'home': 20,
+    'list_lost': 15,
+    'list_found': 15,
+    'view_item': 15,
+    'report_lost': 8,
+    'report_found': 8,
+    'claim': 7,
+    'login': 7,
+    'admin': 5,
+}
+
+ITEM_NAMES = ['Wallet', 'Phone', 'Keys', 'Umbrella', 'Backpack', 'Laptop', 'Water Bottle', 'Headphones']
+CATEGORIES = ['Electronics', 'Clothing', 'Accessories', 'Books', 'Documents', 'Keys', 'Bags', 'Other']
+LOCATIONS = ['Library', 'Cafeteria', 'Main Entrance', 'Parking Lot', 'Gym', 'Lecture Hall A']
+
+LOAD_TEST_PASSWORD = 'loadtest'
+
+
+def make_png(width, height, color):
+    """Build a small solid-colour PNG image without needing Pillow"""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    row = b'\x00' + bytes(color) * width
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row * height))
+            + chunk(b'IEND', b''))
+
+
+def encode_multipart(fields, files):
+    """Encode form fields and (name, filename, bytes) files as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, filename, content in files:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class InProcessClient:
+    """Sends requests straight to the WSGI app through Flask's test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, files=None):
+        if files:
+            data = dict(data or {})
+            for name, filename, content in files:
+                data[name] = (BytesIO(content), filename)
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.get_data(as_text=True)
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses, like the test client does"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """Sends requests to a running server, keeping its own session cookie"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+
+    def request(self, method, path, data=None, files=None):
+        body = None
+        headers = {}
+        if files:
+            body, headers['Content-Type'] = encode_multipart(data or {}, files)
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request, timeout=30) as response:
+                return response.status, response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode('utf-8', 'replace')
+
+
+class Stats:
+    """Thread-safe collection of request results"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = Counter()
+        self.errors = Counter()
+
+    def record(self, action, seconds, status):
+        with self.lock:
+            self.latencies[action].append(seconds)
+            self.statuses[status] += 1
+
+    def record_error(self, message):
+        with self.lock:
+            self.errors[message] += 1
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class VirtualUser:
+    """One simulated user running random actions until the deadline"""
+
+    def __init__(self, client, account, stats, item_ids, rng):
+        self.client = client
+        self.username, self.password, role = account
+        self.is_admin = role == 'admin'
+        self.stats = stats
+        self.item_ids = item_ids
+        self.rng = rng
+
+    def timed(self, action, method, path, data=None, files=None):
+        started = time.perf_counter()
+        try:
+            status, body = self.client.request(method, path, data, files)
+        except Exception as e:  # connection errors, timeouts, exceptions in the app
+            self.stats.record(action, time.perf_counter() - started, 'exception')
+            self.stats.record_error(f'{type(e).__name__}: {e}')
+            return None, ''
+        self.stats.record(action, time.perf_counter() - started, status)
+        return status, body
+
+    def login(self):
+        self.client.request('GET', '/logout')
+        return self.timed('login', 'POST', '/login',
+                          {'username': self.username, 'password': self.password})
+
+    def report(self, kind):
+        data = {
+            'item_name': self.rng.choice(ITEM_NAMES),
+            'category': self.rng.choice(CATEGORIES),
+            'description': 'Reported by the load test',
+            f'{kind}_date': f'2024-12-{self.rng.randint(1, 28):02d}',
+            'location': self.rng.choice(LOCATIONS),
+            'contact_name': self.username,
+            'contact_email': f'{self.username}@example.com',
+        }
+        files = None
+        if self.rng.random() < 0.5:
+            color = [self.rng.randrange(256) for _ in range(3)]
+            files = [('image', 'photo.png', make_png(32, 32, color))]
+        self.timed(f'report_{kind}', 'POST', f'/report/{kind}', data, files)
+
+    def run_action(self, action):
+        if action == 'home':
+            self.timed(action, 'GET', '/')
+        elif action in ('list_lost', 'list_found'):
+            self.timed(action, 'GET', '/lost' if action == 'list_lost' else '/found')
+        elif action == 'view_item':
+            kind = self.rng.choice(['lost', 'found'])
+            self.timed(action, 'GET', f'/item/{kind}/{self.rng.choice(self.item_ids[kind])}')
+        elif action == 'report_lost':
+            self.report('lost')
+        elif action == 'report_found':
+            self.report('found')
+        elif action == 'claim':
+            kind = self.rng.choice(['lost', 'found'])
+            self.timed(action, 'POST', f'/claim/{kind}/{self.rng.choice(self.item_ids[kind])}',
+                       {'claimant_name': self.username, 'claim_description': 'Load test claim'})
+        elif action == 'login':
+            self.login()
+        elif action == 'admin':
+            # Regular users only get redirected, so only admins load the dashboard
+            if self.is_admin:
+                self.timed(action, 'GET', '/admin')
+            else:
+                self.timed('home', 'GET', '/')
+
+    def run(self, deadline):
+        self.login()
+        names, weights = zip(*ACTIONS.items())
+        while time.time() < deadline:
+            self.run_action(self.rng.choices(names, weights)[0])
+
+
+def prepare_database(database, users, admins):
+    """Create load test accounts directly in a database.
+
+    Passwords are stored the way signup() stores them. Returns a list of
+    (username, password, role) tuples.
+    """
+    db = sqlite3.connect(database)
+    accounts = [(f'loaduser{i}', LOAD_TEST_PASSWORD, 'user') for i in range(users)] + \
+               [(f'loadadmin{i}', LOAD_TEST_PASSWORD, 'admin') for i in range(admins)]
+    db.executemany(
+        '''INSERT OR IGNORE INTO users (username, password, email, full_name, role)
+           VALUES (?, ?, ?, ?, ?)''',
+        [(name, password + '_hash', f'{name}@example.com', name, role) for name, password, role in accounts]
+    )
+    db.commit()
+    db.close()
+    return accounts
+
+
+def sign_up_accounts(client, users, admin_username, admin_password):
+    """Create load test users through the signup form of a running server.
+
+    Admins can't sign up, so every admin user logs in as admin_username.
+    """
+    accounts = []
+    for i in range(users):
+        username = f'loaduser{i}'
+        # Signing up an existing user just shows an error, which is fine
+        client.request('POST', '/signup', {
+            'username': username, 'full_name': username, 'email': f'{username}@example.com',
+            'password': LOAD_TEST_PASSWORD, 'confirm_password': LOAD_TEST_PASSWORD,
+        })
+        accounts.append((username, LOAD_TEST_PASSWORD, 'user'))
+    return accounts + [(admin_username, admin_password, 'admin')]
+
+
+def find_item_ids(client, account):
+    """Collect item ids to view and claim from the list pages"""
+    client.request('POST', '/login', {'username': account[0], 'password': account[1]})
+    item_ids = {}
+    for kind in ('lost', 'found'):
+        status, body = client.request('GET', f'/{kind}')
+        item_ids[kind] = sorted({int(i) for i in re.findall(rf'/item/{kind}/(\d+)', body)}) or [1]
+    return item_ids
+
+
+def run_load_test(make_client, accounts, concurrency, duration, seed=None, stats=None):
+    """Run concurrency virtual users for duration seconds and return (stats, elapsed)"""
+    stats = stats or Stats()
+    rng = random.Random(seed)
+    item_ids = find_item_ids(make_client(), accounts[0])
+
+    deadline = time.time() + duration
+    threads = []
+    for i in range(concurrency):
+        user = VirtualUser(make_client(), accounts[i % len(accounts)], stats, item_ids,
+                           random.Random(rng.random()))
+        threads.append(threading.Thread(target=user.run, args=(deadline,), daemon=True))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats, time.perf_counter() - started
+
+
+def format_report(stats, elapsed, concurrency):
+    """Summarize the results as a text table"""
+    all_latencies = sorted(t for values in stats.latencies.values() for t in values)
+    total = len(all_latencies)
+    lock_errors = sum(count for message, count in stats.errors.items() if 'database is locked' in message)
+
+    lines = [
+        f'Concurrency: {concurrency} users, {elapsed:.1f} s',
+        f'Requests: {total} ({total / elapsed if elapsed else 0:.1f} req/s)',
+        '',
+        f"{'action':<14}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for action, values in sorted(stats.latencies.items()) + [('ALL', all_latencies)]:
+        values = sorted(values)
+        lines.append(f'{action:<14}{len(values):>8}'
+                     + ''.join(f'{percentile(values, p) * 1000:>10.1f}' for p in (0.5, 0.9, 0.99))
+                     + f'{(values[-1] if values else 0) * 1000:>10.1f}')
+
+    lines.append('')
+    lines.append('Status codes: ' + ', '.join(f'{status}: {count}' for status, count in
+                                              sorted(stats.statuses.items(), key=lambda kv: str(kv[0]))))
+    lines.append(f"'database is locked' errors: {lock_errors} ({lock_errors / total * 100 if total else 0:.2f}% of requests)")
+    for message, count in stats.errors.most_common(10):
+        lines.append(f'  {count:>6} x {message[:100]}')
+    return '\n'.join(lines)
+
+
+def seed_items(database, count):
+    """Add count unclaimed items (alternating lost and found) and return their ('lost'|'found', id) pairs"""
+    db = sqlite3.connect(database)
+    items = []
+    for i in range(count):
+        kind = ('lost', 'found')[i % 2]
+        cursor = db.execute(
+            f'INSERT INTO {kind}_items (item_name, category, {kind}_date, location, contact_name) VALUES (?, ?, ?, ?, ?)',
+            (ITEM_NAMES[i % len(ITEM_NAMES)], CATEGORIES[i % len(CATEGORIES)], '2024-12-01',
+             LOCATIONS[i % len(LOCATIONS)], 'Bulk Benchmark')
+        )
+        items.append((kind, cursor.lastrowid))
+    db.commit()
+    db.close()
+    return items
+
+
+def run_bulk_benchmark(client, items):
+    """Time changing the status of items three ways with a logged-in admin test client.
+
+    1. one /admin/update_status POST per item
+    2. the same, also reloading the dashboard after each one like a browser does
+    3. one /admin/bulk/status POST for all of them
+    Returns {name: seconds} and the bulk request's JSON summary.
+    """
+    timings = {}
+    for name, status, reload_dashboard in (('one request per item', 'claimed', False),
+                                           ('one request per item + dashboard reload', 'returned', True)):
+        started = time.perf_counter()
+        for kind, item_id in items:
+            client.post('/admin/update_status', data={'item_type': kind, 'item_id': item_id, 'status': status})
+            if reload_dashboard:
+                client.get('/admin').get_data()
+        timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = client.post('/admin/bulk/status', headers={'Accept': 'application/json'},
+                           data={'status': 'unclaimed', 'items': [f'{kind}:{item_id}:returned' for kind, item_id in items]})
+    summary = response.get_json()
+    timings['one bulk request'] = time.perf_counter() - started
+    return timings, summary
+
+
+def format_bulk_report(timings, count):
+    """Summarize run_bulk_benchmark() results as text"""
+    bulk = timings['one bulk request']
+    lines = [f'Changing the status of {count} items:']
+    for name, seconds in timings.items():
+        speedup = f'{seconds / bulk:>8.1f}x slower than bulk' if name != 'one bulk request' else ''
+        lines.append(f'  {name:<42}{seconds * 1000:>10.1f} ms  {speedup}'.rstrip())
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Lost and Found app with concurrent users.')
+    parser.add_argument('--concurrency', type=int, default=10, help='number of simultaneous users')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to run for')
+    parser.add_argument('--url', help='test a running server instead of running the app in this process')
+    parser.add_argument('--database', default='lost_and_found.db',
+                        help='database to copy for an in-process run (the copy is deleted afterwards)')
+    parser.add_argument('--admins', type=int, default=2, help='how many of the users are admins')
+    parser.add_argument('--admin-user', default='admin', help='admin account to use with --url')
+    parser.add_argument('--admin-password', default='admin123', help='password of the --admin-user account')
+    parser.add_argument('--keep-rate-limits', action='store_true',
+                        help='keep the report rate limit on for in-process runs (it is off by default)')
+    parser.add_argument('--seed', type=int, help='random seed for a repeatable action sequence')
+    parser.add_argument('--bulk-benchmark', type=int, metavar='N',
+                        help='compare N single status updates with one bulk update instead of load testing')
+    args = parser.parse_args()
+
+    users = max(1, args.concurrency - args.admins)
+    if args.url:
+        print(f'⚠️  Load testing {args.url} - this adds users, items and claims to its database.')
+        accounts = sign_up_accounts(HttpClient(args.url), users, args.admin_user, args.admin_password)
+        if args.admins == 0:
+            accounts.pop()
+        stats, elapsed = run_load_test(lambda: HttpClient(args.url), accounts, args.concurrency,
+                                       args.duration, args.seed)
+        print(format_report(stats, elapsed, args.concurrency))
+        print('(Errors inside the server show up as status 500; check its log for "database is locked".)')
+        return
+
+    from flask import got_request_exception
+    from app import create_app, migrate_db
+
+    workdir = tempfile.mkdtemp(prefix='lost_and_found_load_')
+    try:
+        database = os.path.join(workdir, 'load_test.db')
+        shutil.copyfile(args.database, database)
+        migrate_db(database)
+        accounts = prepare_database(database, users, args.admins)
+
+        if args.bulk_benchmark:
+            items = seed_items(database, args.bulk_benchmark)
+            app = create_app({'DATABASE': database, 'JINJA_BYTECODE_CACHE_DIR': False})
+            client = app.test_client()
+            admin = prepare_database(database, users=0, admins=1)[0]
+            client.post('/login', data={'username': admin[0], 'password': admin[1]})
+            timings, summary = run_bulk_benchmark(client, items)
+            print(format_bulk_report(timings, len(items)))
+            print(f"Bulk request: {summary['message']}")
+            return
+
+        config = {
+            'DATABASE': database,
+            'UPLOAD_FOLDER': os.path.join(workdir, 'uploads'),
+            'JINJA_BYTECODE_CACHE_DIR': False,
+            'PRECOMPILE_TEMPLATES': True,
+        }
+        if not args.keep_rate_limits:
+            config['REPORT_RATE_LIMIT'] = 10 ** 9
+        app = create_app(config)
+
+        stats = Stats()
+
+        def on_exception(sender, exception, **extra):
+            stats.record_error(f'{type(exception).__name__}: {exception}')
+
+        got_request_exception.connect(on_exception, app)
+        app.logger.disabled = True  # exceptions are counted above instead of logged
+
+        stats, elapsed = run_load_test(lambda: InProcessClient(app), accounts, args.concurrency,
+                                       args.duration, args.seed, stats)
+        print(format_report(stats, elapsed, args.concurrency))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
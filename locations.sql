@@ -0,0 +1,70 @@
+-- Campus location gazetteer loaded by the location gazetteer migration in app.py
+-- Every location has a canonical name and an optional parent, forming a
+-- campus > building > zone hierarchy. Items store the id of the location their
+-- free-text location resolves to (see Gazetteer in app.py).
+
+INSERT INTO locations (id, name, parent_id) VALUES
+(1, 'Campus', NULL),
+(2, 'Library', 1),
+(3, 'Library 1st Floor', 2),
+(4, 'Library 2nd Floor', 2),
+(5, 'Library Study Rooms', 2),
+(6, 'Student Center', 1),
+(7, 'Cafeteria', 6),
+(8, 'Bookstore', 6),
+(9, 'Main Building', 1),
+(10, 'Main Entrance', 9),
+(11, 'Lecture Halls', 9),
+(12, 'Science Building', 1),
+(13, 'Lab', 12),
+(14, 'Gym', 1),
+(15, 'Locker Rooms', 14),
+(16, 'Pool', 14),
+(17, 'Parking Lot', 1),
+(18, 'Bus Stop', 1);
+
+-- Other names people use for the same places (lowercase, words separated by single spaces)
+INSERT INTO location_aliases (alias, location_id) VALUES
+('campus', 1),
+('lib', 2),
+('main library', 2),
+('library ground floor', 3),
+('library first floor', 3),
+('library 1f', 3),
+('lib 1st floor', 3),
+('library second floor', 4),
+('library 2f', 4),
+('library upstairs', 4),
+('lib 2nd floor', 4),
+('study room', 5),
+('study rooms', 5),
+('library study room', 5),
+('student centre', 6),
+('student union', 6),
+('canteen', 7),
+('dining hall', 7),
+('cafe', 7),
+('food court', 7),
+('book store', 8),
+('front entrance', 10),
+('entrance', 10),
+('lobby', 10),
+('reception', 10),
+('lecture hall', 11),
+('auditorium', 11),
+('science block', 12),
+('labs', 13),
+('laboratory', 13),
+('computer lab', 13),
+('gymnasium', 14),
+('sports center', 14),
+('fitness center', 14),
+('locker room', 15),
+('lockers', 15),
+('changing room', 15),
+('swimming pool', 16),
+('parking', 17),
+('car park', 17),
+('parking garage', 17),
+('garage', 17),
+('bus station', 18);
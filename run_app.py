@@ -2,7 +2,20 @@
 Simple startup script for the Lost and Found Management System
 """
 
-from app import app
+import os
+from app import create_app, migrate_db, startup_report
+
+# Created at import time so WSGI servers can also use "run_app:app"
+app = create_app({
+    # Compile every template now instead of on the first request for each page
+    'PRECOMPILE_TEMPLATES': os.getenv('PRECOMPILE_TEMPLATES', 'True').lower() in ['true', '1', 'yes'],
+})
+
+# Bring the database schema up to date before serving requests. This runs on
+# import, so WSGI servers using "run_app:app" get a migrated database too;
+# migrate_db() is safe to call from several workers at once.
+with app.app_context():
+    migrate_db()
 
 if __name__ == '__main__':
     print("🚀 Starting Lost and Found Management System...")
@@ -10,8 +23,10 @@ if __name__ == '__main__':
     print("🔧 Press Ctrl+C to stop the server")
     print("=" * 60)
     
+    print("⏱️  Startup timings:")
+    print(startup_report(app))
+    
     # Run the Flask application - configure for production
-    import os
     host = os.getenv('HOST', '0.0.0.0')
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('DEBUG', 'False').lower() in ['true', '1', 'yes']
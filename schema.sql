@@ -1,5 +1,7 @@
 -- Lost and Found Management System Database Schema
 -- SQLite database schema file
+-- This is the baseline schema (migration 1). Later changes are added as
+-- migrations in app.py (see MIGRATIONS) instead of editing this file.
 
 -- Create users table for authentication
 CREATE TABLE IF NOT EXISTS users (
@@ -61,17 +63,3 @@ CREATE TABLE IF NOT EXISTS claims (
     FOREIGN KEY (item_id) REFERENCES lost_items(id) ON DELETE CASCADE,
     FOREIGN KEY (item_id) REFERENCES found_items(id) ON DELETE CASCADE
 );
-
--- Insert sample data for testing purposes (optional)
-INSERT INTO lost_items (item_name, category, description, lost_date, location, contact_name, contact_email, contact_phone, status) VALUES
-('Wallet', 'Electronics', 'Black leather wallet with cards and cash', '2024-12-01', 'Library', 'John Doe', 'john@example.com', '555-0101', 'unclaimed'),
-('Phone', 'Electronics', 'iPhone 12 in blue case', '2024-12-02', 'Cafeteria', 'Jane Smith', 'jane@example.com', '555-0102', 'unclaimed');
-
-INSERT INTO found_items (item_name, category, description, found_date, location, contact_name, contact_email, contact_phone, status) VALUES
-('Umbrella', 'Clothing', 'Black umbrella with wooden handle', '2024-12-01', 'Main Entrance', 'Mike Johnson', 'mike@example.com', '555-0103', 'unclaimed'),
-('Keys', 'Accessories', 'Set of 3 keys with red keychain', '2024-12-02', 'Parking Lot', 'Sarah Wilson', 'sarah@example.com', '555-0104', 'unclaimed');
-
--- Insert default users (passwords are hashed versions of 'password123' and 'admin123')
-INSERT INTO users (username, password, email, full_name, role) VALUES
-('admin', 'admin123_hash', 'admin@lostandfound.com', 'System Administrator', 'admin'),
-('user', 'user123_hash', 'user@lostandfound.com', 'Regular User', 'user');
\ No newline at end of file
@@ -2,7 +2,7 @@
 Test script to verify all routes work correctly
 """
 
-from app import app
+from app import create_app
 import sys
 
 def test_routes():
@@ -11,6 +11,7 @@ def test_routes():
     print("🧪 Testing Flask Application Routes...")
     print("=" * 50)
     
+    app = create_app()
     with app.test_client() as client:
         routes_to_test = [
             ('/', 'Home Page'),
@@ -0,0 +1,106 @@
+"""
+Tests for the app factory, the template bytecode cache and the startup script
+"""
+
+import importlib
+import os
+import sqlite3
+import sys
+
+import pytest
+
+import app as lost_and_found
+from conftest import log_in
+
+
+def make_app(tmp_path, **config):
+    return lost_and_found.create_app({'DATABASE': str(tmp_path / 'test.db'), **config})
+
+
+def test_create_app_applies_config_and_sets_up_extensions(tmp_path):
+    app = make_app(tmp_path, MATCH_CONCURRENCY_LIMIT=2, JINJA_BYTECODE_CACHE_DIR=False)
+
+    assert app.config['MATCH_CONCURRENCY_LIMIT'] == 2
+    assert app.config['REPORT_RATE_LIMIT'] == lost_and_found.DEFAULT_CONFIG['REPORT_RATE_LIMIT']
+    assert {'match_slots', 'event_broker', 'image_indexes', 'startup_timings'} <= set(app.extensions)
+    match_slots = app.extensions['match_slots']
+    assert [match_slots.acquire(blocking=False) for _ in range(3)] == [True, True, False]
+    # Creating the app leaves the database alone
+    assert not os.path.exists(app.config['DATABASE'])
+
+
+def test_bytecode_cache_defaults_to_instance_folder(tmp_path):
+    app = make_app(tmp_path)
+    assert app.jinja_env.bytecode_cache.directory == os.path.join(app.instance_path, 'jinja_cache')
+
+
+def test_bytecode_cache_directory_can_be_set_or_turned_off(tmp_path):
+    app = make_app(tmp_path, JINJA_BYTECODE_CACHE_DIR=str(tmp_path / 'cache'))
+    assert app.jinja_env.bytecode_cache.directory == str(tmp_path / 'cache')
+    assert os.path.isdir(tmp_path / 'cache')
+
+    assert make_app(tmp_path, JINJA_BYTECODE_CACHE_DIR=False).jinja_env.bytecode_cache is None
+
+
+def test_unwritable_bytecode_cache_falls_back_to_memory(tmp_path, caplog):
+    (tmp_path / 'not-a-directory').write_text('')
+    app = make_app(tmp_path, JINJA_BYTECODE_CACHE_DIR=str(tmp_path / 'not-a-directory' / 'cache'))
+
+    assert app.jinja_env.bytecode_cache is None
+    assert 'is not writable' in caplog.text
+    assert app.test_client().get('/login').status_code == 200
+
+
+def test_precompile_templates_fills_the_cache(tmp_path):
+    cache = tmp_path / 'cache'
+    app = make_app(tmp_path, JINJA_BYTECODE_CACHE_DIR=str(cache), PRECOMPILE_TEMPLATES=True)
+
+    names = app.jinja_env.list_templates(extensions=['html'])
+    assert len(os.listdir(cache)) == len(names)
+    assert 'precompile templates' in dict(app.extensions['startup_timings'])
+    # A second app (a new worker) reads the compiled templates instead of compiling them
+    assert make_app(tmp_path, JINJA_BYTECODE_CACHE_DIR=str(cache), PRECOMPILE_TEMPLATES=True)
+    assert len(os.listdir(cache)) == len(names)
+
+
+def test_precompile_templates_command(tmp_path):
+    cache = tmp_path / 'cache'
+    app = make_app(tmp_path, JINJA_BYTECODE_CACHE_DIR=str(cache))
+    result = app.test_cli_runner().invoke(args=['precompile-templates'])
+
+    names = app.jinja_env.list_templates(extensions=['html'])
+    assert result.exit_code == 0, result.output
+    assert f'Compiled {len(names)} templates into {cache}' in result.output
+    assert len(os.listdir(cache)) == len(names)
+
+    result = make_app(tmp_path, JINJA_BYTECODE_CACHE_DIR=False).test_cli_runner().invoke(
+        args=['precompile-templates'])
+    assert result.exit_code != 0
+    assert 'bytecode cache is disabled' in result.output
+
+
+def test_startup_report(tmp_path):
+    app = make_app(tmp_path, JINJA_BYTECODE_CACHE_DIR=False, PRECOMPILE_TEMPLATES=True)
+    lines = lost_and_found.startup_report(app).splitlines()
+
+    # One line per step, then the total
+    assert [' '.join(line.split()[:-2]) for line in lines] == \
+        ['import app.py', 'create app', 'template cache', 'precompile templates', 'total']
+    assert all(line.endswith(' ms') for line in lines)
+
+
+@pytest.fixture()
+def run_app(tmp_path, monkeypatch):
+    """Import run_app.py the way a WSGI server would, with its database in tmp_path"""
+    monkeypatch.setitem(lost_and_found.DEFAULT_CONFIG, 'DATABASE', str(tmp_path / 'wsgi.db'))
+    monkeypatch.setenv('PRECOMPILE_TEMPLATES', 'false')
+    sys.modules.pop('run_app', None)
+    yield importlib.import_module('run_app')
+    sys.modules.pop('run_app', None)
+
+
+def test_wsgi_import_migrates_database(tmp_path, run_app):
+    conn = sqlite3.connect(tmp_path / 'wsgi.db')
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(lost_and_found.MIGRATIONS)
+    conn.close()
+    assert log_in(run_app.app.test_client()).get('/lost').status_code == 200
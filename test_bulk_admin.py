@@ -0,0 +1,101 @@
+"""
+Tests for the bulk admin actions
+"""
+
+import pytest
+
+import app as lost_and_found
+import load_test
+
+JSON = {'Accept': 'application/json'}
+
+
+@pytest.fixture()
+def items(app):
+    return load_test.seed_items(app.config['DATABASE'], 6)
+
+
+def statuses(db):
+    rows = db.execute('SELECT "lost", id, status FROM lost_items UNION ALL '
+                      'SELECT "found", id, status FROM found_items').fetchall()
+    return {(kind, item_id): status for kind, item_id, status in rows}
+
+
+def selection(items, status='unclaimed'):
+    return [f'{kind}:{item_id}:{status}' for kind, item_id in items]
+
+
+def test_bulk_status_change(db, admin_client, items):
+    response = admin_client.post('/admin/bulk/status', headers=JSON, data={
+        'status': 'returned',
+        'items': selection(items[:4]) + ['lost:999:unclaimed', 'bogus', f'{items[4][0]}:{items[4][1]}'],
+    })
+
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['changed'] == 4 and summary['selected'] == 5
+    assert sorted(summary['items']) == sorted(f'{kind}:{item_id}' for kind, item_id in items[:4])
+    assert summary['message'] == ('Set 4 of 5 selected items to returned. '
+                                  '1 changed since the dashboard loaded or no longer exist.')
+    assert [statuses(db)[item] for item in items] == ['returned'] * 4 + ['unclaimed'] * 2
+    # The dashboard's counts come back with the summary
+    assert summary['stats'] == lost_and_found.dashboard_stats(db)
+
+
+def test_bulk_status_skips_items_claimed_after_dashboard_loaded(db, admin_client, items):
+    kind, item_id = items[0]
+    lost_and_found.claim_item(db, kind, item_id, 'Claimant', '', '', '')
+
+    response = admin_client.post('/admin/bulk/status', headers=JSON,
+                                 data={'status': 'returned', 'items': selection(items[:2])})
+
+    summary = response.get_json()
+    assert summary['category'] == 'info'
+    assert summary['items'] == ['{}:{}'.format(*items[1])]
+    assert statuses(db)[items[0]] == 'claimed'
+    assert statuses(db)[items[1]] == 'returned'
+
+
+def test_bulk_status_rejects_unknown_status(db, admin_client, items):
+    response = admin_client.post('/admin/bulk/status', headers=JSON,
+                                 data={'status': 'lost', 'items': selection(items[:1])})
+    assert response.status_code == 400
+    assert set(statuses(db).values()) == {'unclaimed'}
+
+
+def test_bulk_archive_hides_items_from_lists(db, admin_client, items):
+    kind, item_id = items[0]
+    admin_client.post('/admin/bulk/archive', headers=JSON, data={'items': selection(items[:1])})
+
+    assert statuses(db)[(kind, item_id)] == 'archived'
+    assert f'/item/{kind}/{item_id}"' not in admin_client.get(f'/{kind}').get_data(as_text=True)
+
+
+def test_bulk_delete_removes_items_and_claims(db, admin_client, items):
+    lost_and_found.claim_item(db, items[0][0], items[0][1], 'Claimant', '', '', '')
+
+    # A plain form post (no JavaScript) gets a flash message and the dashboard
+    response = admin_client.post('/admin/bulk/delete',
+                                 data={'items': selection(items[:1], 'claimed') + selection(items[1:3])})
+    assert response.status_code == 302
+    assert 'Deleted 3 of 3 selected items.' in admin_client.get('/admin').get_data(as_text=True)
+
+    assert sorted(statuses(db)) == sorted(items[3:])
+    assert db.execute('SELECT COUNT(*) FROM claims').fetchone()[0] == 0
+
+
+def test_bulk_delete_skips_items_claimed_after_dashboard_loaded(db, admin_client, items):
+    lost_and_found.claim_item(db, items[0][0], items[0][1], 'Claimant', '', '', '')
+
+    response = admin_client.post('/admin/bulk/delete', headers=JSON, data={'items': selection(items[:2])})
+
+    assert response.get_json()['changed'] == 1
+    assert items[0] in statuses(db) and items[1] not in statuses(db)
+    assert db.execute('SELECT COUNT(*) FROM claims').fetchone()[0] == 1
+
+
+def test_bulk_benchmark_runs(admin_client, items):
+    timings, summary = load_test.run_bulk_benchmark(admin_client, items)
+    assert summary['changed'] == len(items)
+    assert set(timings) == {'one request per item', 'one request per item + dashboard reload', 'one bulk request'}
+    assert 'slower than bulk' in load_test.format_bulk_report(timings, len(items))
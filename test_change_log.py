@@ -0,0 +1,108 @@
+"""
+Tests for the item_changes log
+
+Triggers must record every insert, update and delete, consumers must resume
+from their stored position, and compaction must keep the latest change to
+every row that a consumer could still need.
+"""
+
+import app as lost_and_found
+
+
+def add_found_item(db, name='Keys', image_hash=None):
+    cursor = db.execute(
+        'INSERT INTO found_items (item_name, category, found_date, location, contact_name, image_hash) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (name, 'Keys', '2024-12-01', 'Library', 'Finder', image_hash)
+    )
+    db.commit()
+    return cursor.lastrowid
+
+
+def changes(db):
+    return [(c['table_name'], c['row_id'], c['op'], c['version']) for c in lost_and_found.read_changes(db, 0)]
+
+
+def test_triggers_log_every_write(db):
+    item_id = add_found_item(db)
+    lost_and_found.claim_item(db, 'found', item_id, 'Claimant', '', '', '')
+    db.execute('DELETE FROM found_items WHERE id = ?', (item_id,))
+    db.commit()
+
+    assert changes(db) == [
+        ('found_items', item_id, 'insert', 1),
+        ('found_items', item_id, 'update', 2),
+        ('claims', 1, 'insert', 1),
+        ('found_items', item_id, 'delete', 3),
+    ]
+
+
+def test_consumer_resumes_from_stored_position(db):
+    for i in range(7):
+        add_found_item(db, f'Item {i}')
+
+    batches = []
+    assert lost_and_found.consume_changes(db, 'stats', batches.append, batch_size=3) == 7
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+    add_found_item(db, 'Item 7')
+    batches = []
+    assert lost_and_found.consume_changes(db, 'stats', batches.append, batch_size=3) == 1
+    assert batches[0][0]['row_id'] == 8
+    assert lost_and_found.get_consumer_position(db, 'stats') == lost_and_found.latest_change_seq(db)
+
+
+def test_compaction_keeps_latest_change_per_row(db):
+    first = add_found_item(db)
+    second = add_found_item(db)
+    lost_and_found.set_item_status(db, 'found', first, 'claimed')
+    lost_and_found.consume_changes(db, 'stats', lambda batch: None)
+    db.execute('DELETE FROM found_items WHERE id = ?', (second,))
+    db.commit()
+
+    # The delete of the second item hasn't been read by the consumer yet
+    assert lost_and_found.compact_changes(db) == 2
+    assert changes(db) == [
+        ('found_items', first, 'update', 2),
+        ('found_items', second, 'delete', 2),
+    ]
+
+    lost_and_found.consume_changes(db, 'stats', lambda batch: None)
+    assert lost_and_found.compact_changes(db) == 1
+    assert changes(db) == [('found_items', first, 'update', 2)]
+
+
+def test_photo_index_follows_changes(db):
+    index = lost_and_found.ImageHashIndex('found_items')
+    item_id = add_found_item(db, image_hash='00000000000000ff')
+    assert index.search(db, '00000000000000ff', 0) == {item_id: 0}
+
+    # A backfilled or replaced hash is picked up without a rebuild
+    db.execute('UPDATE found_items SET image_hash = ? WHERE id = ?', ('ffff000000000000', item_id))
+    db.commit()
+    assert index.search(db, '00000000000000ff', 4) == {}
+    assert index.search(db, 'ffff000000000000', 0) == {item_id: 0}
+
+    db.execute('DELETE FROM found_items WHERE id = ?', (item_id,))
+    db.commit()
+    assert index.search(db, 'ffff000000000000', 0) == {}
+
+
+def test_photo_index_tolerates_compaction(app, db):
+    index = lost_and_found.ImageHashIndex('found_items')
+    item_id = add_found_item(db, image_hash='00000000000000ff')
+    index.search(db, '00000000000000ff', 0)
+
+    # The index isn't a registered consumer, so compaction can drop the delete before it reads it
+    db.execute('DELETE FROM found_items WHERE id = ?', (item_id,))
+    db.commit()
+    lost_and_found.compact_changes(db)
+    assert lost_and_found.read_changes(db, 0) == []
+
+    # The stale id still comes back from the index, but matching only scores live items
+    assert index.search(db, '00000000000000ff', 0) == {item_id: 0}
+    app.extensions['image_indexes']['found_items'] = index
+    matches = lost_and_found.find_similar_items(
+        'lost', {'item_name': 'Keys', 'category': 'Keys', 'location': 'Library', 'lost_date': '2024-12-01',
+                 'image_hash': '00000000000000ff'})
+    assert matches == []
@@ -0,0 +1,93 @@
+"""
+Tests for claims and status changes under concurrency
+
+Many people claiming the same item at once must produce exactly one claim,
+and a sustained stream of competing claims must go through without
+"database is locked" errors.
+"""
+
+import threading
+import time
+
+import pytest
+
+import app as lost_and_found
+
+CLAIMERS = 8
+SUSTAINED_SECONDS = 1.0
+SEED_ITEMS = 5000
+
+
+@pytest.fixture()
+def item_ids(db):
+    cursor = db.executemany(
+        'INSERT INTO found_items (item_name, category, found_date, location, contact_name) VALUES (?, ?, ?, ?, ?)',
+        [(f'Item {i}', 'Keys', '2024-12-01', 'Library', 'Finder') for i in range(SEED_ITEMS)]
+    )
+    db.commit()
+    return [row[0] for row in db.execute('SELECT id FROM found_items ORDER BY id')]
+
+
+def run_claimers(app, item_ids, deadline=None):
+    """Have CLAIMERS threads, each with its own connection, claim item_ids in
+    order until the list or the deadline runs out.
+
+    Returns ({item_id: number of successful claims}, exceptions, elapsed seconds).
+    """
+    start = threading.Barrier(CLAIMERS)
+    lock = threading.Lock()
+    successes = {}
+    errors = []
+
+    def claimer(index):
+        with app.app_context():
+            db = lost_and_found.get_db()
+            start.wait()
+            try:
+                for item_id in item_ids:
+                    if deadline is not None and time.perf_counter() > deadline:
+                        break
+                    if lost_and_found.claim_item(db, 'found', item_id, f'Claimant {index}', '', '', ''):
+                        with lock:
+                            successes[item_id] = successes.get(item_id, 0) + 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=claimer, args=(i,)) for i in range(CLAIMERS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return successes, errors, time.perf_counter() - started
+
+
+def test_same_item_is_claimed_once(app, db, item_ids):
+    successes, errors, _ = run_claimers(app, item_ids[:1])
+
+    assert not errors
+    assert successes == {item_ids[0]: 1}
+    assert db.execute('SELECT COUNT(*) FROM claims WHERE item_id = ?', (item_ids[0],)).fetchone()[0] == 1
+    assert db.execute('SELECT status FROM found_items WHERE id = ?', (item_ids[0],)).fetchone()[0] == 'claimed'
+
+
+def test_sustained_competing_claims(app, db, item_ids):
+    # Every thread races for every item, over and over, for a fixed time
+    successes, errors, elapsed = run_claimers(app, item_ids, deadline=time.perf_counter() + SUSTAINED_SECONDS)
+
+    assert not errors, errors[:3]
+    assert set(successes.values()) == {1}
+    assert db.execute('SELECT COUNT(*) FROM claims').fetchone()[0] == len(successes)
+    assert db.execute('SELECT COUNT(*) FROM found_items WHERE status = "claimed"').fetchone()[0] == len(successes)
+    # A very loose floor; a few thousand claims per second is normal
+    assert len(successes) / elapsed > 50
+
+
+def test_status_change_is_compare_and_set(db, item_ids):
+    item_id = item_ids[0]
+    assert lost_and_found.set_item_status(db, 'found', item_id, 'claimed', 'unclaimed')
+    # A second admin still looking at the old "unclaimed" status loses
+    assert not lost_and_found.set_item_status(db, 'found', item_id, 'returned', 'unclaimed')
+    assert db.execute('SELECT status FROM found_items WHERE id = ?', (item_id,)).fetchone()[0] == 'claimed'
@@ -0,0 +1,105 @@
+"""
+Tests for the live update broker and the /events stream
+"""
+
+import json
+
+import app as lost_and_found
+
+
+def subscribe(broker, user_id, max_connections=10, max_per_user=3, queue_size=10):
+    return broker.subscribe(user_id, max_connections, max_per_user, queue_size)
+
+
+def test_global_connection_cap():
+    broker = lost_and_found.EventBroker()
+    streams = [subscribe(broker, user_id, max_connections=2) for user_id in (1, 2, 3)]
+    assert streams[0] and streams[1]
+    assert streams[2] is None
+
+    broker.unsubscribe(streams[0])
+    assert subscribe(broker, 3, max_connections=2) is not None
+
+
+def test_user_at_cap_loses_oldest_stream():
+    broker = lost_and_found.EventBroker()
+    oldest, middle = subscribe(broker, 1, max_per_user=2), subscribe(broker, 1, max_per_user=2)
+    newest = subscribe(broker, 1, max_per_user=2)
+
+    # A reopened tab replaces the oldest stream instead of being refused
+    assert newest is not None
+    assert not broker.is_subscribed(oldest)
+    assert broker.is_subscribed(middle) and broker.is_subscribed(newest)
+    assert oldest.get_nowait() == lost_and_found.EventBroker.CLOSED
+
+
+def test_replaced_stream_with_full_queue_still_gets_closed():
+    broker = lost_and_found.EventBroker()
+    oldest = subscribe(broker, 1, max_per_user=1, queue_size=2)
+    broker.publish('new_item', {'id': 1})
+    broker.publish('new_item', {'id': 2})
+
+    subscribe(broker, 1, max_per_user=1, queue_size=2)
+    assert oldest.get_nowait() == lost_and_found.EventBroker.CLOSED
+    assert oldest.empty()
+
+
+def test_events_routed_to_one_user():
+    broker = lost_and_found.EventBroker()
+    mine, theirs = subscribe(broker, 1), subscribe(broker, 2)
+
+    broker.publish('match', {'id': 5}, user_id=1)
+    broker.publish('new_item', {'id': 6})
+
+    assert mine.get_nowait() == 'event: match\ndata: {"id": 5}\n\n'
+    assert mine.get_nowait() == 'event: new_item\ndata: {"id": 6}\n\n'
+    assert theirs.get_nowait() == 'event: new_item\ndata: {"id": 6}\n\n'
+    assert theirs.empty()
+
+
+def test_client_with_full_queue_is_dropped():
+    broker = lost_and_found.EventBroker()
+    slow, fast = subscribe(broker, 1, queue_size=2), subscribe(broker, 2, queue_size=5)
+
+    for i in range(3):
+        broker.publish('new_item', {'id': i})
+
+    assert not broker.is_subscribed(slow)
+    assert broker.is_subscribed(fast)
+    assert fast.qsize() == 3
+
+
+def test_events_stream(app, admin_client):
+    app.config['EVENT_STREAM_HEARTBEAT'] = 0.05
+    response = admin_client.get('/events', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+
+    assert next(chunks).startswith(b'retry:')
+    assert next(chunks) == b': heartbeat\n\n'
+
+    app.extensions['event_broker'].publish('new_item', {'item_name': 'Keys'})
+    event = next(chunks).decode()
+    while event == ': heartbeat\n\n':
+        event = next(chunks).decode()
+    assert event.startswith('event: new_item\n')
+    assert json.loads(event.split('data: ', 1)[1]) == {'item_name': 'Keys'}
+
+    # Closing the stream frees its connection slot
+    response.close()
+    assert subscribe(app.extensions['event_broker'], 2, max_connections=1) is not None
+
+
+def test_replaced_stream_sends_closed_event(app, admin_client):
+    app.config['EVENT_STREAM_MAX_PER_USER'] = 1
+    oldest = admin_client.get('/events', buffered=False)
+    chunks = iter(oldest.response)
+    assert next(chunks).startswith(b'retry:')
+
+    # Replaced while paused between yields, it still tells the page to stop
+    newest = admin_client.get('/events', buffered=False)
+    assert next(chunks) == lost_and_found.EventBroker.CLOSED.encode()
+    assert list(chunks) == []
+
+    oldest.close()
+    newest.close()
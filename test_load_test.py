@@ -0,0 +1,24 @@
+"""
+Smoke test for the load testing script
+
+Runs a short in-process load test against a copy of the sample database.
+"""
+
+import app as lost_and_found
+import load_test
+
+
+def test_short_load_test_runs_cleanly(app):
+    app.config['REPORT_RATE_LIMIT'] = 10 ** 9
+    with app.app_context():
+        lost_and_found.init_db()
+    accounts = load_test.prepare_database(app.config['DATABASE'], users=3, admins=1)
+
+    stats, elapsed = load_test.run_load_test(lambda: load_test.InProcessClient(app), accounts,
+                                             concurrency=4, duration=1, seed=7)
+
+    total = sum(len(values) for values in stats.latencies.values())
+    assert total > 0
+    assert not stats.errors
+    assert all(status in (200, 302) for status in stats.statuses)
+    assert 'requests' in load_test.format_report(stats, elapsed, 4).lower()
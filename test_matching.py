@@ -0,0 +1,163 @@
+"""
+Tests for the similar item matcher
+
+The pruned top-k scorer in find_similar_items must return exactly what the
+straightforward "score every candidate, sort, take 5" version returns.
+"""
+
+import difflib
+import random
+from datetime import datetime
+
+import pytest
+
+import app as lost_and_found
+
+NAMES = ['wallet', 'black wallet', 'leather wallet', 'phone', 'iphone 12', 'iphone', 'keys',
+         'car keys', 'umbrella', 'blue umbrella', 'laptop', 'laptop charger', 'water bottle', 'bottle']
+CATEGORIES = ['Electronics', 'Accessories', 'Keys', 'Clothing', 'Bags']
+LOCATIONS = ['Library', 'Lib 2nd floor', 'Library first floor', 'Cafeteria', 'Canteen', 'Main Entrance', 'Parking Lot',
+             'Gym', 'Locker room', 'Lab', 'Room 203', 'room 203']
+PHOTOS = [0x8f3c_21a0_55e1_0c7b, 0x1234_5678_9abc_def0, 0xffff_0000_ffff_0000]
+
+
+def reference_similar_items(compare_items, item_type, item_data, image_matches, gazetteer):
+    """The original, unpruned scoring loop"""
+    compare_date_col = 'found_date' if item_type == 'lost' else 'lost_date'
+    item_name = item_data.get('item_name', '').lower()
+    item_category = item_data.get('category', '').lower()
+    item_location_id = gazetteer.resolve(item_data['location'])
+    try:
+        item_date = datetime.strptime(item_data.get('lost_date' if item_type == 'lost' else 'found_date', ''),
+                                      '%Y-%m-%d')
+    except ValueError:
+        item_date = None
+
+    similar_items = []
+    for compare_item in compare_items:
+        score = 0
+        reasons = []
+        if item_category == compare_item['category'].lower():
+            score += 40
+            reasons.append(f"Same category: {item_category}")
+        name_similarity = difflib.SequenceMatcher(None, item_name, compare_item['item_name'].lower()).ratio()
+        if name_similarity > 0.6:
+            score += int(name_similarity * 30)
+            reasons.append(f"Similar name ({int(name_similarity * 100)}% match)")
+        location_similarity, location_reason = lost_and_found.location_match(
+            gazetteer, item_data['location'], item_location_id, compare_item)
+        if location_similarity > 0.5:
+            score += int(location_similarity * 20)
+            reasons.append(location_reason)
+        if item_date:
+            try:
+                compare_date = datetime.strptime(compare_item[compare_date_col], '%Y-%m-%d')
+                date_diff = abs((item_date - compare_date).days)
+                if date_diff <= 7:
+                    score += max(0, 10 - date_diff)
+                    reasons.append(f"Reported {date_diff} days apart")
+            except ValueError:
+                pass
+        if compare_item['id'] in image_matches:
+            image_similarity = 1 - image_matches[compare_item['id']] / 64
+            score += int(image_similarity * 30)
+            reasons.append(f"Similar photo ({int(image_similarity * 100)}% match)")
+        if score >= 30:
+            similar_items.append({'item': compare_item, 'score': score, 'reasons': reasons})
+    similar_items.sort(key=lambda x: x['score'], reverse=True)
+    return similar_items[:5]
+
+
+def random_item(rng):
+    return {
+        'item_name': rng.choice(NAMES),
+        'category': rng.choice(CATEGORIES),
+        'location': rng.choice(LOCATIONS),
+        'date': f'2024-12-{rng.randint(1, 28):02d}',
+        'image_hash': similar_photo(rng) if rng.random() < 0.5 else None,
+    }
+
+
+def similar_photo(rng):
+    """Hash of one of a few photos with some bits flipped"""
+    value = rng.choice(PHOTOS)
+    for _ in range(rng.randint(0, 12)):
+        value ^= 1 << rng.randrange(64)
+    return f'{value:016x}'
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_pruned_scorer_matches_reference(app, db, seed):
+    rng = random.Random(seed)
+    gazetteer = lost_and_found.get_gazetteer(db)
+    for i in range(rng.randint(0, 300)):
+        item = random_item(rng)
+        db.execute(
+            '''INSERT INTO found_items (item_name, category, found_date, location, location_id, contact_name,
+                                        image_hash, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            (item['item_name'], item['category'], item['date'], item['location'],
+             gazetteer.resolve(item['location']), 'Finder', item['image_hash'],
+             f'2024-12-01 00:{i // 60:02d}:{i % 60:02d}')
+        )
+    db.commit()
+
+    for _ in range(10):
+        query = random_item(rng)
+        item_data = {'item_name': query['item_name'], 'category': query['category'],
+                     'location': query['location'], 'lost_date': query['date'],
+                     'image_hash': query['image_hash']}
+
+        compare_items = db.execute(
+            'SELECT * FROM found_items WHERE status = ? ORDER BY created_at DESC', ('unclaimed',)
+        ).fetchall()
+        image_matches = {}
+        if query['image_hash']:
+            image_matches = app.extensions['image_indexes']['found_items'].search(
+                db, query['image_hash'], lost_and_found.IMAGE_MATCH_MAX_DISTANCE)
+
+        expected = reference_similar_items(compare_items, 'lost', item_data, image_matches, gazetteer)
+        actual = lost_and_found.find_similar_items('lost', item_data)
+
+        assert [(m['item']['id'], m['score'], m['reasons']) for m in actual] == \
+            [(m['item']['id'], m['score'], m['reasons']) for m in expected]
+
+
+def test_pruning_skips_hopeless_candidates(db):
+    db.executemany(
+        'INSERT INTO found_items (item_name, category, found_date, location, contact_name) VALUES (?, ?, ?, ?, ?)',
+        [('umbrella', 'Clothing', '2020-01-01', 'Gym', 'Finder')] * 50
+    )
+    db.commit()
+
+    before = dict(lost_and_found.match_stats)
+    matches = lost_and_found.find_similar_items(
+        'lost', {'item_name': 'phone', 'category': 'Electronics', 'location': 'Library', 'lost_date': '2024-12-01'})
+
+    assert matches == []
+    assert lost_and_found.match_stats['candidates'] - before['candidates'] == 50
+    assert lost_and_found.match_stats['pruned'] - before['pruned'] == 50
+
+
+def test_gazetteer_resolves_aliases_and_hierarchy(db):
+    gazetteer = lost_and_found.get_gazetteer(db)
+    names = {name: location_id for location_id, name in gazetteer.names.items()}
+
+    assert gazetteer.resolve('Lib 2nd floor') == names['Library 2nd Floor']
+    assert gazetteer.resolve('near the printers, library second floor') == names['Library 2nd Floor']
+    assert gazetteer.resolve('LIBRARY') == names['Library']
+    assert gazetteer.resolve('Room 203') is None
+    assert gazetteer.resolve('Student center cafeteria') == names['Cafeteria']
+    assert gazetteer.resolve('Science building lab') == names['Lab']
+    assert gazetteer.resolve('Library entrance') == names['Library']
+    assert gazetteer.resolve('Front entrance') == names['Main Entrance']
+    assert gazetteer.suggest('lib')[:1] == ['Library']
+    assert 'Cafeteria' in gazetteer.suggest('cant')
+
+    assert gazetteer.closeness(names['Library'], names['Library']) == (1.0, names['Library'])
+    assert gazetteer.closeness(names['Library'], names['Library 2nd Floor'])[0] == 0.8
+    assert gazetteer.closeness(names['Library 1st Floor'], names['Library 2nd Floor'])[1] == names['Library']
+    assert lost_and_found.location_points(gazetteer.closeness(names['Library'], names['Gym'])[0]) == 0
+    # Everything is on campus, so that alone isn't nearby
+    assert gazetteer.closeness(names['Campus'], names['Library']) == (0.0, None)
+    assert gazetteer.closeness(names['Campus'], names['Campus']) == (1.0, names['Campus'])
@@ -0,0 +1,111 @@
+"""
+Tests for photo hashing, the BK-tree and the photo term in match scores
+"""
+
+import os
+import random
+
+import pytest
+
+import app as lost_and_found
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def make_photo(path, seed):
+    """Save a 320x240 PNG of random gray blocks; different seeds give different pictures"""
+    rng = random.Random(seed)
+    blocks = Image.new('L', (8, 6))
+    blocks.putdata([rng.randrange(256) for _ in range(8 * 6)])
+    blocks.resize((320, 240), Image.BILINEAR).convert('RGB').save(path)
+    return path
+
+
+def hash_distance(a, b):
+    return lost_and_found.hamming_distance(int(a, 16), int(b, 16))
+
+
+def test_resized_and_recompressed_copies_hash_alike(tmp_path):
+    original = make_photo(tmp_path / 'original.png', seed=1)
+    with Image.open(original) as image:
+        image.resize((160, 120)).save(tmp_path / 'small.png')
+        image.save(tmp_path / 'compressed.jpg', quality=40)
+    other = make_photo(tmp_path / 'other.png', seed=2)
+
+    original_hash = lost_and_found.compute_image_hash(original)
+    assert len(original_hash) == 16
+    for copy in ('small.png', 'compressed.jpg'):
+        copy_hash = lost_and_found.compute_image_hash(tmp_path / copy)
+        assert hash_distance(original_hash, copy_hash) <= lost_and_found.IMAGE_MATCH_MAX_DISTANCE
+    assert hash_distance(original_hash, lost_and_found.compute_image_hash(other)) > \
+        lost_and_found.IMAGE_MATCH_MAX_DISTANCE
+
+
+def test_unreadable_image_has_no_hash(tmp_path):
+    (tmp_path / 'broken.jpg').write_bytes(b'not an image')
+    assert lost_and_found.compute_image_hash(tmp_path / 'broken.jpg') is None
+    assert lost_and_found.compute_image_hash(tmp_path / 'missing.jpg') is None
+
+
+def test_bk_tree_search_matches_brute_force():
+    rng = random.Random(7)
+    # Clusters of near-duplicate hashes, like several photos of one item
+    hashes = []
+    for _ in range(40):
+        base = rng.getrandbits(64)
+        hashes.append(base)
+        for _ in range(rng.randrange(10)):
+            flips = rng.sample(range(64), rng.randrange(1, 16))
+            hashes.append(base ^ sum(1 << bit for bit in flips))
+
+    tree = lost_and_found.BKTree()
+    for item_id, value in enumerate(hashes):
+        tree.add(value, item_id)
+
+    for query in rng.sample(hashes, 20) + [rng.getrandbits(64) for _ in range(5)]:
+        for max_distance in (0, 4, lost_and_found.IMAGE_MATCH_MAX_DISTANCE, 20):
+            expected = {item_id: lost_and_found.hamming_distance(query, value)
+                        for item_id, value in enumerate(hashes)
+                        if lost_and_found.hamming_distance(query, value) <= max_distance}
+            assert tree.search(query, max_distance) == expected
+
+
+def test_backfill_hashes_existing_uploads(app, db):
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+    for seed in (1, 2):
+        make_photo(os.path.join(app.config['UPLOAD_FOLDER'], f'{seed}.png'), seed)
+    db.executemany(
+        'INSERT INTO lost_items (item_name, category, lost_date, location, contact_name, image_filename) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [('Bag', 'Bags', '2024-12-01', 'Library', 'Owner', filename) for filename in ('1.png', '2.png', 'gone.png')]
+    )
+    db.commit()
+
+    result = app.test_cli_runner().invoke(args=['backfill-image-hashes', '--workers', '1'])
+
+    assert result.exit_code == 0, result.output
+    assert 'lost_items: hashed 2 of 3 images' in result.output
+    hashes = dict(db.execute('SELECT image_filename, image_hash FROM lost_items').fetchall())
+    for filename in ('1.png', '2.png'):
+        assert hashes[filename] == lost_and_found.compute_image_hash(
+            os.path.join(app.config['UPLOAD_FOLDER'], filename))
+    assert hashes['gone.png'] is None
+
+
+def test_similar_photo_raises_score(db):
+    db.executemany(
+        'INSERT INTO found_items (item_name, category, found_date, location, contact_name, image_hash) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [('Black backpack', 'Bags', '2024-12-01', 'Gym', 'Finder', image_hash)
+         for image_hash in ('00000000000000ff', None)]
+    )
+    db.commit()
+
+    matches = lost_and_found.find_similar_items('lost', {
+        'item_name': 'Black backpack', 'category': 'Bags', 'location': 'Gym', 'lost_date': '2024-12-01',
+        'image_hash': '00000000000000fe'})
+
+    with_photo, without_photo = sorted(matches, key=lambda match: match['item']['image_hash'] is None)
+    assert with_photo['score'] - without_photo['score'] == int((1 - 1 / 64) * 30)
+    assert 'Similar photo (98% match)' in with_photo['reasons']
+    assert not any(reason.startswith('Similar photo') for reason in without_photo['reasons'])
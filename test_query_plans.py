@@ -0,0 +1,144 @@
+"""
+Query plan regression tests
+
+Runs EXPLAIN QUERY PLAN over every SQL statement in app.py against a large,
+migrated test database and fails if a query has to scan a whole table or
+build a temporary B-tree to sort its results.
+"""
+
+import ast
+import os
+import random
+import re
+import sqlite3
+
+import pytest
+
+import app as lost_and_found
+
+APP_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+ITEM_TABLES = ('lost_items', 'found_items')
+
+# Statements that are allowed to scan a whole table, with the reason why
+ALLOWED_SCANS = {
+    'WHERE image_filename IS NOT NULL AND image_hash IS NULL':
+        'one-off backfill command, not a request path',
+    'SELECT id, image_hash FROM lost_items WHERE image_hash IS NOT NULL':
+        'photo index is built once per process, then kept current from the change log',
+    'SELECT id, image_hash FROM found_items WHERE image_hash IS NOT NULL':
+        'photo index is built once per process, then kept current from the change log',
+    'FROM locations': 'gazetteer is loaded once per process',
+    'FROM location_aliases': 'gazetteer is loaded once per process',
+    'SELECT id, location FROM': 're-resolves every item after the gazetteer changes; migration and command only',
+    'DELETE FROM rate_limits WHERE tokens': 'sweep of full rate limit buckets, at most every few minutes',
+}
+
+SEED_ITEMS = 20000
+SEED_CLAIMS = 5000
+SEED_USERS = 1000
+
+
+def collect_statements():
+    """Find the SQL passed to execute()/executemany() anywhere in app.py.
+
+    f-strings that interpolate a table name are expanded once per item table.
+    Returns a sorted list of unique statements.
+    """
+    with open(APP_SOURCE, 'r') as f:
+        tree = ast.parse(f.read())
+
+    statements = set()
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr in ('execute', 'executemany') and node.args):
+            continue
+        sql = node.args[0]
+        if isinstance(sql, ast.Constant) and isinstance(sql.value, str):
+            statements.add(sql.value)
+        elif isinstance(sql, ast.JoinedStr):
+            statements.update(expand_fstring(sql))
+
+    return sorted(s for s in statements
+                  if s.lstrip().split(None, 1)[0].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'))
+
+
+def expand_fstring(node):
+    """Render an f-string for each item table; skip ones that interpolate anything else"""
+    for value in node.values:
+        if isinstance(value, ast.FormattedValue) and 'table' not in ast.unparse(value.value):
+            return []
+
+    rendered = []
+    for table in ITEM_TABLES:
+        parts = []
+        for value in node.values:
+            parts.append(value.value if isinstance(value, ast.Constant) else table)
+        rendered.append(''.join(parts))
+    return rendered
+
+
+@pytest.fixture(scope='module')
+def seeded_db(tmp_path_factory):
+    """A migrated database with enough rows for the planner to prefer indexes"""
+    path = str(tmp_path_factory.mktemp('plans') / 'plans.db')
+    lost_and_found.migrate_db(path)
+
+    rng = random.Random(42)
+    db = sqlite3.connect(path)
+    db.executemany(
+        'INSERT INTO users (username, password, email, full_name, role) VALUES (?, ?, ?, ?, ?)',
+        [(f'user{i}', 'secret_hash', f'user{i}@example.com', f'User {i}', 'user') for i in range(SEED_USERS)]
+    )
+    for table, date_col in (('lost_items', 'lost_date'), ('found_items', 'found_date')):
+        db.executemany(
+            f'''INSERT INTO {table} (item_name, category, {date_col}, location, contact_name,
+                                     status, user_id, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            [(f'Item {i}', rng.choice(['Electronics', 'Keys', 'Bags', 'Books']),
+              f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}', rng.choice(['Library', 'Cafeteria', 'Gym']),
+              'Someone', rng.choice(['unclaimed'] * 8 + ['claimed', 'returned']), rng.randint(1, SEED_USERS),
+              f'2024-01-01 00:00:{i:05d}')
+             for i in range(SEED_ITEMS)]
+        )
+    db.executemany(
+        '''INSERT INTO claims (item_type, item_id, claimant_name, created_at)
+           VALUES (?, ?, ?, ?)''',
+        [(rng.choice(['lost', 'found']), rng.randint(1, SEED_ITEMS), 'Claimant', f'2024-02-01 00:00:{i:05d}')
+         for i in range(SEED_CLAIMS)]
+    )
+    db.commit()
+    db.execute('ANALYZE')
+    yield db
+    db.close()
+
+
+def test_statements_found():
+    statements = collect_statements()
+    assert any('FROM lost_items' in s for s in statements)
+    assert any('FROM claims' in s for s in statements)
+
+
+def test_migrations_are_idempotent(seeded_db):
+    path = seeded_db.execute('PRAGMA database_list').fetchone()[2]
+    version = lost_and_found.migrate_db(path)
+    assert seeded_db.execute('PRAGMA user_version').fetchone()[0] == version
+
+
+@pytest.mark.parametrize('statement', collect_statements())
+def test_query_plan(seeded_db, statement):
+    plan = seeded_db.execute(f'EXPLAIN QUERY PLAN {statement}',
+                             [None] * statement.count('?')).fetchall()
+    details = [row[3] for row in plan]
+
+    problems = []
+    for detail in details:
+        # Older SQLite versions print "SCAN TABLE x", newer ones "SCAN x"
+        if re.match(r'SCAN (TABLE )?\w+( AS \w+)?$', detail):
+            problems.append(detail)
+        if 'USE TEMP B-TREE' in detail:
+            problems.append(detail)
+
+    if any(pattern in statement for pattern in ALLOWED_SCANS):
+        return
+    assert not problems, f'{" ".join(statement.split())}\n  ' + '\n  '.join(details)
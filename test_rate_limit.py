@@ -0,0 +1,75 @@
+"""
+Tests for report rate limiting and match scan load shedding
+"""
+
+import sqlite3
+
+import pytest
+
+import app as lost_and_found
+
+REPORT = {'item_name': 'Umbrella', 'category': 'Other', 'lost_date': '2024-12-01',
+          'location': 'Library', 'contact_name': 'Owner'}
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, app, db):
+    app.config['RATE_LIMIT_STORAGE'] = request.param
+    return lost_and_found.get_rate_limit_store()
+
+
+def test_bucket_denies_burst_and_refills(store):
+    # Three tokens, refilled at one per second
+    assert [store.consume('k', 3, 1, 100) for _ in range(3)] == [0, 0, 0]
+    assert store.consume('k', 3, 1, 100) == pytest.approx(1)
+    assert store.consume('k', 3, 1, 100.5) == pytest.approx(0.5)
+    assert store.consume('k', 3, 1, 101) == 0
+    # Other keys have their own bucket
+    assert store.consume('other', 3, 1, 101) == 0
+
+
+def test_sqlite_store_sweeps_full_buckets(app, db):
+    store = lost_and_found.SQLiteRateLimitStore(app.config['DATABASE'], 5)
+    store.consume('old', 2, 1, 100)
+    store.consume('new', 2, 1, 100 + store.SWEEP_INTERVAL)
+    assert [row[0] for row in db.execute('SELECT bucket_key FROM rate_limits')] == ['new']
+
+
+def test_sqlite_store_fails_open_when_locked(app, db):
+    app.config['WRITE_RETRIES'] = 0
+    store = lost_and_found.SQLiteRateLimitStore(app.config['DATABASE'], 0.01)
+    other = sqlite3.connect(app.config['DATABASE'])
+    other.execute('BEGIN IMMEDIATE')
+    try:
+        assert [store.consume('k', 1, 1, 100) for _ in range(3)] == [0, 0, 0]
+    finally:
+        other.rollback()
+        other.close()
+
+
+def test_reports_are_rate_limited(app, admin_client):
+    app.config['REPORT_RATE_LIMIT'] = 2
+    assert [admin_client.post('/report/lost', data=REPORT).status_code for _ in range(2)] == [302, 302]
+
+    response = admin_client.post('/report/lost', data=REPORT)
+    assert response.status_code == 429
+    assert 1 <= int(response.headers['Retry-After']) <= 30
+
+    # Showing the form is never limited
+    assert all(admin_client.get('/report/lost').status_code == 200 for _ in range(5))
+
+
+def test_reports_are_shed_when_match_slots_are_busy(app, admin_client):
+    app.config['MATCH_SLOT_TIMEOUT'] = 0.01
+    match_slots = app.extensions['match_slots']
+    for _ in range(app.config['MATCH_CONCURRENCY_LIMIT']):
+        match_slots.acquire()
+    try:
+        response = admin_client.post('/report/lost', data=REPORT)
+    finally:
+        for _ in range(app.config['MATCH_CONCURRENCY_LIMIT']):
+            match_slots.release()
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == str(app.config['MATCH_RETRY_AFTER'])
+    assert admin_client.post('/report/lost', data=REPORT).status_code == 302
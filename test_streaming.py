@@ -0,0 +1,45 @@
+"""
+Tests for the streamed item list and admin pages
+"""
+
+import pytest
+
+import app as lost_and_found
+
+
+@pytest.fixture()
+def client(db, admin_client):
+    db.executemany(
+        'INSERT INTO lost_items (item_name, category, lost_date, location, contact_name) VALUES (?, ?, ?, ?, ?)',
+        [(f'Item {i}', 'Keys', '2024-12-01', 'Library', 'Owner') for i in range(300)]
+    )
+    db.commit()
+    lost_and_found.claim_item(db, 'lost', 7, 'Claimant Seven', 'seven@example.com', '', '')
+    return admin_client
+
+
+def test_list_page_is_streamed_in_chunks(client):
+    response = client.get('/lost', buffered=False)
+    assert response.is_streamed
+    chunks = list(response.response)
+    response.close()
+
+    html = b''.join(chunks).decode()
+    assert len(chunks) > 1
+    # Small template pieces are collected into larger writes
+    assert all(len(chunk) >= lost_and_found.STREAM_CHUNK_SIZE for chunk in chunks[:-1])
+    assert 'Item 0' in html and 'Item 299' in html
+
+
+def test_flashed_message_shown_once(client):
+    with client.session_transaction() as session:
+        session['_flashes'] = [('success', 'Hello from the last page')]
+    assert 'Hello from the last page' in client.get('/found').get_data(as_text=True)
+    assert 'Hello from the last page' not in client.get('/found').get_data(as_text=True)
+
+
+def test_admin_dashboard_shows_counts_and_claims(client):
+    html = client.get('/admin').get_data(as_text=True)
+    assert 'Claimed by: Claimant Seven' in html
+    assert html.count('Claimed by:') == 1
+    assert '<div class="stat-number">299</div>' in html